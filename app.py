@@ -1,23 +1,40 @@
 import os
-import json
-import random
 from datetime import datetime
 from flask import Flask, request, jsonify, send_file, render_template_string
 from flask_cors import CORS
 import subprocess
-import tempfile
 from weasyprint import HTML
 
+import cache
+import config
+import name_grammar
+import pdf_delivery
+import store_service
+
 app = Flask(__name__, static_folder='.', static_url_path='')
 CORS(app)
 
-# Database file
-DB_FILE = 'names.json'
+# Names go through the same store as app_secure: appended under its lock and
+# group-committed to the log (or sent to the store service), never rewriting names.json
+db_file = config.DB_SQLITE_FILE if config.DB_BACKEND == 'sqlite' else config.DB_FILE
+if config.DB_STORE_SERVICE:
+    name_cache = store_service.init_store_client(
+        config.DB_STORE_SOCKET,
+        config.DB_STORE_FLUSH_INTERVAL,
+        config.DB_STORE_MAX_BUFFER,
+        ['--db-file', db_file, '--backend', config.DB_BACKEND] if config.DB_STORE_AUTOSTART else None,
+        config.DB_AUTO_SAVE_INTERVAL
+    )
+else:
+    name_cache = cache.init_cache(
+        db_file,
+        config.DB_AUTO_SAVE_INTERVAL,
+        config.DB_LOG_FLUSH_INTERVAL,
+        config.DB_BACKEND
+    )
 
-# Initialize database if not exists
-if not os.path.exists(DB_FILE):
-    with open(DB_FILE, 'w') as f:
-        json.dump([], f)
+# Name tables shared with app_secure, compiled once at startup
+name_engine = name_grammar.init_name_engine(config.NAME_STYLES, config.NAME_DEFAULT_LOCALE)
 
 # Health endpoint
 @app.route("/health", methods=["GET"])
@@ -45,58 +62,24 @@ def generate_name():
         if not first_name or not last_name:
             return jsonify({"success": False, "error": "First and last name required"}), 400
         
-        # Irish first names
-        irish_first = ["Aidan", "Brendan", "Cillian", "Darragh", "Eoin", "Finn", "Gearoid", "Liam", "Niall", "Oisin", "Padraig", "Ronan", "Sean", "Tadhg", "Cormac"]
-        
-        # Irish last names with prefixes
-        irish_prefixes = ["Mc", "O'", "Mac", "Fitz"]
-        irish_roots = ["Gleeson", "Murphy", "Kelly", "O'Brien", "Ryan", "Sullivan", "Walsh", "McCarthy", "O'Connor", "Doyle", "Kennedy", "Lynch", "Moore", "Reilly", "Brennan"]
-        
-        # Generate leprechaun name
-        if method == "traditional":
-            leprechaun_first = random.choice(irish_first)
-            leprechaun_last = random.choice(irish_prefixes) + random.choice(irish_roots)
-        elif method == "modern":
-            leprechaun_first = random.choice(["Finn", "Riley", "Quinn", "Casey", "Dylan"])
-            leprechaun_last = random.choice(["Green", "Gold", "Rainbow", "Clover", "Shamrock"])
-        else:
-            leprechaun_first = random.choice(irish_first)
-            leprechaun_last = random.choice(irish_roots)
-        
-        leprechaun_name = f"{leprechaun_first} {leprechaun_last}"
-        
-        # Meanings
-        meanings = [
-            "Keeper of the rainbow's end",
-            "Guardian of hidden treasures",
-            "Weaver of golden dreams",
-            "Master of four-leaf clovers",
-            "Protector of ancient magic",
-            "Craftsman of enchanted shoes",
-            "Watcher of the emerald hills",
-            "Keeper of the pot of gold"
-        ]
-        meaning = random.choice(meanings)
-        
-        # Save to database
-        with open(DB_FILE, 'r') as f:
-            names = json.load(f)
+        # Generate leprechaun name; unknown methods use the classic style
+        style = method if method in ('traditional', 'modern') else 'classic'
+        leprechaun_name = name_engine.generate(style)
+        meaning = name_engine.generate('meaning')
         
+        # Save to database; the store numbers the record under its lock
         entry = {
-            "id": len(names) + 1,
             "real_name": f"{first_name} {last_name}",
             "leprechaun_name": leprechaun_name,
             "meaning": meaning,
             "method": method,
             "timestamp": datetime.now().isoformat()
         }
-        names.append(entry)
-        
-        with open(DB_FILE, 'w') as f:
-            json.dump(names, f, indent=2)
+        name_cache.add(entry, wait_for_id=True)
         
         return jsonify({
             "success": True,
+            "id": entry["id"],
             "leprechaun_name": leprechaun_name,
             "meaning": meaning,
             "method": method,
@@ -128,21 +111,20 @@ def generate_pdf():
         html_content = html_content.replace('{{meaning}}', meaning)
         html_content = html_content.replace('{{date}}', datetime.now().strftime('%B %d, %Y'))
         
-        # Generate PDF
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
-            pdf_path = tmp.name
+        # Generate PDF in memory and send it as the response body (no temp file)
+        pdf = HTML(string=html_content).write_pdf()
         
-        HTML(string=html_content).write_pdf(pdf_path)
-        
-        return send_file(
-            pdf_path,
-            as_attachment=True,
-            download_name=f"leprechaun-certificate-{datetime.now().strftime('%Y%m%d')}.pdf",
-            mimetype='application/pdf'
-        )
+        return pdf_delivery.pdf_response(pdf, pdf_delivery.certificate_filename(datetime.now()))
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    try:
+        # The reloader would run the app in a child process, which waits forever for
+        # the name store lock held by this one
+        app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
+    finally:
+        # Flush names still waiting for the next group commit
+        cache.stop_cache()
+        store_service.stop_store_client(stop_service=True)
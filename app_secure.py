@@ -4,25 +4,44 @@ Enhanced version with configuration management, caching, and template pre-loadin
 """
 
 import os
+import hmac
 import json
-import random
 import re
+import signal
+import time
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_file, make_response
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
-from weasyprint import HTML
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Import configuration and utility modules
 import config
 import cache
 import template_loader
+import render_pool
+import pdf_cache
+import pdf_batch
+import pdf_delivery
+import pdf_preview
+import pdf_jobs
+import watermark
+import records
+import name_stats
+import name_generator
+import name_grammar
+import name_filter
+import store_service
+import metrics
+import rate_limit_storage  # Registers the sqlite:// rate-limit storage scheme
 
 # Initialize Flask application
 app = Flask(__name__)
-app.secret_key = os.urandom(24)  # Secure random secret key
+app.secret_key = config.SECRET_KEY or os.urandom(24)
+if not config.SECRET_KEY:
+    print("Warning: SECRET_KEY is not set; permalinks only verify until this process restarts")
+PERMALINK_KEY = app.secret_key.encode('utf-8') if isinstance(app.secret_key, str) else app.secret_key
 
 # Security middleware
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_port=1, x_prefix=1)
@@ -44,18 +63,109 @@ limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=config.RATE_LIMIT_DEFAULT,
-    storage_uri="memory://",
-    strategy="fixed-window",
+    storage_uri=rate_limit_storage.usable_storage_uri(config.RATE_LIMIT_STORAGE_URI),
+    strategy=config.RATE_LIMIT_STRATEGY,
     enabled=not config.DEBUG  # Disable in debug mode for development
 )
 
 # Initialize database cache and template loader
-name_cache = cache.init_cache(config.DB_FILE, config.DB_AUTO_SAVE_INTERVAL)
-template_loader_instance = template_loader.init_template_loader(config.PDF_TEMPLATE_DIR)
+db_file = config.DB_SQLITE_FILE if config.DB_BACKEND == 'sqlite' else config.DB_FILE
+if config.DB_STORE_SERVICE:
+    # Names go to the single-writer store service shared by all workers
+    name_cache = store_service.init_store_client(
+        config.DB_STORE_SOCKET,
+        config.DB_STORE_FLUSH_INTERVAL,
+        config.DB_STORE_MAX_BUFFER,
+        ['--db-file', db_file, '--backend', config.DB_BACKEND] if config.DB_STORE_AUTOSTART else None,
+        config.DB_AUTO_SAVE_INTERVAL
+    )
+else:
+    name_cache = cache.init_cache(
+        db_file,
+        config.DB_AUTO_SAVE_INTERVAL,
+        config.DB_LOG_FLUSH_INTERVAL,
+        config.DB_BACKEND
+    )
+
+# Stage timings and counters for /metrics; when None every timed stage is a shared no-op
+metrics_instance = metrics.init_metrics(
+    config.METRICS_BUCKETS, config.METRICS_DIR, config.METRICS_FLUSH_INTERVAL) if config.METRICS_ENABLED else None
+
+template_loader_instance = template_loader.init_template_loader(
+    config.PDF_TEMPLATE_DIR,
+    metrics_instance.timer if metrics_instance else metrics.null_timer
+)
+
+# Aggregates for /stats are built once from history, then updated on every add
+name_statistics = name_stats.NameStatistics(config.STATS_HOURLY_BUCKETS, config.STATS_HEAVY_HITTER_CAPACITY)
+name_cache.add_observer(name_statistics, replay=True)
+
+# Filter of issued names for unique mode, persisted next to the store
+name_filter_instance = None
+if config.UNIQUE_NAMES:
+    name_filter_instance = name_filter.NameFilter(
+        config.NAME_FILTER_CAPACITY,
+        config.NAME_FILTER_ERROR_RATE,
+        config.NAME_FILTER_MAX_BYTES,
+        f"{db_file}.bloom"
+    )
+    loaded = name_filter_instance.load(name_cache.get_count())
+    name_cache.add_observer(name_filter_instance, replay=not loaded)
+    if not loaded:
+        print(f"Rebuilt name filter from {name_filter_instance.count} names")
+
+# Compile the weighted name tables into samplers
+name_grammar.init_name_engine(config.NAME_STYLES, config.NAME_DEFAULT_LOCALE)
 
 # Configure PDF generation
+pdf_render_pool = None
+if config.PDF_RENDER_POOL_ENABLED:
+    pdf_render_pool = render_pool.init_render_pool(
+        config.PDF_TEMPLATE_DIR,
+        workers=config.PDF_RENDER_WORKERS,
+        max_queue=config.PDF_RENDER_QUEUE_DEPTH,
+        timeout=config.PDF_RENDER_TIMEOUT,
+        max_renders_per_worker=config.PDF_RENDER_MAX_JOBS_PER_WORKER
+    )
+
+# Rendered certificates are deterministic, so identical requests are served from cache
+pdf_cache_instance = None
+if config.CACHE_ENABLED:
+    pdf_cache_instance = pdf_cache.init_pdf_cache(
+        max_size=config.CACHE_MAX_SIZE,
+        ttl=config.CACHE_TTL,
+        cache_dir=config.PDF_CACHE_DIR,
+        disk_max_files=config.PDF_CACHE_DISK_MAX_FILES,
+        disk_ttl=config.PDF_CACHE_DISK_TTL
+    )
+
+# Free-tier certificates are watermarked by stamping a cached overlay onto the shared
+# render; without pypdf the watermark has to be rendered into each certificate instead
+watermark_stamper = None
+if config.PDF_WATERMARK_FREE:
+    if watermark.PDF_STAMPING_AVAILABLE:
+        watermark_stamper = watermark.init_watermark_stamper(config.PDF_WATERMARK_TEXT)
+    else:
+        print("pypdf not installed: free-tier watermarks are rendered into each certificate")
+
+# Preview images are rasterized from the PDF pipeline's output and cached separately
+preview_cache_instance = None
+if config.PREVIEW_ENABLED:
+    if pdf_preview.PREVIEW_AVAILABLE:
+        preview_cache_instance = pdf_preview.init_preview_cache(config.PREVIEW_CACHE_MAX_BYTES)
+    else:
+        print("pypdfium2 not installed: /preview is disabled")
 
 # Helper functions
+def timed(stage):
+    """Time a request stage for /metrics (a shared no-op when metrics are disabled)"""
+    return metrics_instance.timer(stage) if metrics_instance else metrics.NULL_STAGE
+
+def count_event(event, amount=1):
+    """Increment a /metrics counter (no-op when metrics are disabled)"""
+    if metrics_instance:
+        metrics_instance.inc(event, amount)
+
 def validate_input(text):
     """Validate user input against regex pattern"""
     if not text or not isinstance(text, str):
@@ -71,63 +181,228 @@ def sanitize_input(text):
         text = text[:50]
     return text
 
-def generate_leprechaun_name(first_name, last_name):
-    """Generate a leprechaun name with Irish flair"""
-    # Use configuration values
-    first_names = config.FIRST_NAMES
-    last_names = config.LAST_NAMES
+def validate_locale(locale):
+    """Check a requested name locale against the configured locales"""
+    return isinstance(locale, str) and locale in config.NAME_STYLES
+
+def draw_name(first_name, last_name, locale):
+    """
+    Draw a seeded leprechaun name, re-drawing names already issued in unique mode
+
+    Returns:
+        (seed, leprechaun name, unique) where unique is None when unique mode is off
+    """
+    if name_filter_instance is None:
+        seed = name_generator.new_seed(first_name, last_name)
+        return seed, name_generator.generate_leprechaun_name(first_name, last_name, seed, locale), None
 
-    if not first_name or not last_name:
-        # Generate random name
-        generated_first = random.choice(first_names)
-        generated_last = random.choice(last_names)
-        return f"{generated_first} {generated_last}"
+    for _ in range(config.UNIQUE_NAMES_MAX_ATTEMPTS):
+        seed = name_generator.new_seed(first_name, last_name)
+        leprechaun_name = name_generator.generate_leprechaun_name(first_name, last_name, seed, locale)
+        if name_filter_instance.claim(leprechaun_name):
+            return seed, leprechaun_name, True
+    return seed, leprechaun_name, False
 
-    # Create Irish-sounding combination
-    irish_prefixes = ['Mc', "O'", 'Fitz']
-    irish_suffixes = ['-een', '-y', ' the Lucky', ' of the Emerald Isle']
+def make_unique(leprechaun_names, inputs, locale):
+    """
+    Re-draw batch names that were already issued (unique mode only)
+
+    Returns:
+        Number of names left duplicated after all attempts
+    """
+    duplicates = 0
+    for i, (first_name, last_name) in enumerate(inputs):
+        attempts = config.UNIQUE_NAMES_MAX_ATTEMPTS
+        while not name_filter_instance.claim(leprechaun_names[i]):
+            attempts -= 1
+            if attempts == 0:
+                duplicates += 1
+                break
+            leprechaun_names[i] = name_generator.generate_leprechaun_name(first_name, last_name, locale=locale)
+    return duplicates
+
+def is_admin_request():
+    """Check the request's bearer token against the configured admin token"""
+    if not config.ADMIN_API_TOKEN:
+        return False
+    auth = request.headers.get('Authorization', '')
+    return auth.startswith('Bearer ') and hmac.compare_digest(auth[len('Bearer '):], config.ADMIN_API_TOKEN)
+
+def is_premium_request():
+    """Check the request's bearer token against the premium tokens"""
+    auth = request.headers.get('Authorization', '')
+    if not auth.startswith('Bearer '):
+        return False
+    token = auth[len('Bearer '):]
+    return any(hmac.compare_digest(token, premium) for premium in config.PDF_PREMIUM_TOKENS)
 
-    # 30% chance to add Irish prefix
-    if random.random() < 0.3:
-        last_name = random.choice(irish_prefixes) + last_name
+def watermark_requested():
+    """Whether this request gets the free tier's watermarked certificate"""
+    return config.PDF_WATERMARK_FREE and not is_premium_request()
 
-    # 20% chance to add Irish suffix
-    if random.random() < 0.2:
-        last_name = last_name + random.choice(irish_suffixes)
+def parse_name_filters(args):
+    """
+    Parse /names query filters
 
-    return f"{first_name} {last_name}"
+    Returns:
+        (filters dict, error message or None)
+    """
+    filters = {}
+    for param in ('from', 'to'):
+        value = args.get(param)
+        if value:
+            try:
+                # Normalized ISO strings compare correctly as plain strings
+                filters[param] = datetime.fromisoformat(value).isoformat()
+            except ValueError:
+                return None, f"Invalid '{param}' date, use ISO format (YYYY-MM-DD)"
+    if args.get('method'):
+        filters['method'] = args.get('method')
+    if args.get('prefix'):
+        filters['prefix'] = args.get('prefix').lower()
+    return filters, None
+
+def name_matches(record, filters):
+    """Check a stored name against /names filters ('from' inclusive, 'to' exclusive)"""
+    timestamp = record.get('timestamp', '')
+    if 'from' in filters and timestamp < filters['from']:
+        return False
+    if 'to' in filters and timestamp >= filters['to']:
+        return False
+    if 'method' in filters and records.method_of(record) != filters['method']:
+        return False
+    if 'prefix' in filters and not (records.leprechaun_name_of(record) or '').lower().startswith(filters['prefix']):
+        return False
+    return True
+
+def public_name_record(seq, record):
+    """Stored name as returned by /names, without the client IP"""
+    return dict({key: value for key, value in record.items() if key != 'ip'}, seq=seq)
 
 def save_to_database(name_data):
     """Save generated name to database using cache"""
     try:
         index = name_cache.add(name_data)
-        return True, f"Name saved successfully (ID: {index})"
+        if index is None:
+            # The store service assigns IDs when the buffered name reaches it
+            return True, "Name queued for saving"
+        return True, f"Name saved successfully (ID: {name_data['id']})"
     except Exception as e:
         return False, f"Error saving to database: {str(e)}"
 
-def generate_pdf(name, template_name='classic-emerald'):
-    """Generate PDF certificate using pre-loaded templates"""
+def pdf_cache_variant(template_name, watermarked):
+    """PDF cache entry a certificate is rendered into"""
+    # Free and premium certificates share one render unless the watermark
+    # has to be rendered into the page, which makes it a separate cache entry
+    return f"{template_name}+watermark" if watermarked and not watermark_stamper else template_name
+
+def generate_pdf(name, template_name='classic-emerald', date_str=None, watermarked=False):
+    """Generate PDF certificate using pre-loaded templates (dated today unless date_str is given)"""
     try:
         # Validate template name
         if template_name not in config.ALLOWED_TEMPLATES:
             template_name = 'classic-emerald'
 
-        # Get pre-loaded template
-        template_content = template_loader_instance.get_template(template_name)
-        if not template_content:
+        # Check pre-loaded template
+        if not template_loader_instance.get_template(template_name):
             return None, f"Template '{template_name}' not found"
 
-        # Replace placeholders
-        html_content = template_content.replace('{{name}}', name)
-        html_content = html_content.replace('{{date}}', datetime.now().strftime('%B %d, %Y'))
+        if date_str is None:
+            date_str = datetime.now().strftime('%B %d, %Y')
 
-        # Generate PDF
-        pdf = HTML(string=html_content).write_pdf()
+        watermark_text = config.PDF_WATERMARK_TEXT if watermarked and not watermark_stamper else None
+        variant = pdf_cache_variant(template_name, watermarked)
+
+        # Serve identical certificates from cache
+        pdf = None
+        if pdf_cache_instance:
+            with timed('pdf_cache'):
+                pdf = pdf_cache_instance.get(variant, name, date_str)
+            count_event('pdf_cache_hits' if pdf is not None else 'pdf_cache_misses')
+
+        if pdf is None:
+            # Generate PDF in a worker process when the pool is enabled; the worker's
+            # stage timings come back with the PDF
+            stages = metrics.StageTimer() if metrics_instance else None
+            try:
+                with timed('render'):
+                    if pdf_render_pool:
+                        pdf = pdf_render_pool.render(template_name, name, date_str, watermark_text, stages)
+                    else:
+                        pdf = template_loader_instance.render(
+                            template_name, name, date_str, watermark_text, stages or metrics.null_timer)
+            finally:
+                if stages:
+                    metrics_instance.record(stages.durations)
+            count_event('pdf_renders')
+
+            if pdf_cache_instance:
+                pdf_cache_instance.put(variant, name, date_str, pdf)
+
+        if watermarked and watermark_stamper:
+            with timed('watermark'):
+                pdf = watermark_stamper.stamp(pdf)
+        return pdf, None
+
+    except render_pool.RenderPoolBusy:
+        count_event('pdf_render_busy')
+        raise
+    except Exception as e:
+        count_event('pdf_render_errors')
+        return None, f"PDF generation error: {str(e)}"
+
+def generate_batch_pdf(names, template_name='classic-emerald', watermarked=False):
+    """Generate a single multi-page PDF with one certificate per name"""
+    try:
+        if template_name not in config.ALLOWED_TEMPLATES:
+            template_name = 'classic-emerald'
+
+        date_str = datetime.now().strftime('%B %d, %Y')
+        watermark_text = config.PDF_WATERMARK_TEXT if watermarked and not watermark_stamper else None
+        stages = metrics.StageTimer() if metrics_instance else None
+        try:
+            with timed('render_batch'):
+                if pdf_render_pool:
+                    pdf = pdf_render_pool.render_many(template_name, names, date_str, watermark_text, stages)
+                else:
+                    pdf = template_loader_instance.render_many(
+                        template_name, names, date_str, watermark_text, stages or metrics.null_timer)
+        finally:
+            if stages:
+                metrics_instance.record(stages.durations)
+        count_event('pdf_renders', len(names))
+
+        if watermarked and watermark_stamper:
+            with timed('watermark'):
+                pdf = watermark_stamper.stamp(pdf)
         return pdf, None
 
+    except render_pool.RenderPoolBusy:
+        count_event('pdf_render_busy')
+        raise
     except Exception as e:
+        count_event('pdf_render_errors')
         return None, f"PDF generation error: {str(e)}"
 
+def generate_pdf_queued(name, template_name='classic-emerald', watermarked=False):
+    """Generate a PDF certificate, waiting for room in the render queue"""
+    for _ in range(config.PDF_RENDER_TIMEOUT * 10):
+        try:
+            return generate_pdf(name, template_name, watermarked=watermarked)
+        except render_pool.RenderPoolBusy:
+            time.sleep(0.1)
+    return None, "PDF generator is busy"
+
+# Background jobs render certificates without holding the request open
+pdf_job_queue = pdf_jobs.init_job_queue(
+    generate_pdf_queued,
+    workers=config.PDF_JOB_WORKERS,
+    max_pending=config.PDF_JOB_MAX_PENDING,
+    result_ttl=config.PDF_JOB_RESULT_TTL,
+    store=pdf_jobs.create_job_store(config.PDF_JOB_DB),
+    sweep_interval=config.PDF_JOB_SWEEP_INTERVAL
+)
+
 # Routes
 @app.route('/')
 def index():
@@ -143,22 +418,33 @@ def generate_name():
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
 
-        # Get and validate inputs
-        first_name = data.get('firstName', '')
-        last_name = data.get('lastName', '')
+        with timed('validate'):
+            # Get and validate inputs
+            first_name = data.get('firstName', '')
+            last_name = data.get('lastName', '')
 
-        # Sanitize inputs
-        first_name = sanitize_input(first_name)
-        last_name = sanitize_input(last_name)
+            # Sanitize inputs
+            first_name = sanitize_input(first_name)
+            last_name = sanitize_input(last_name)
 
-        # Validate if provided
-        if first_name and not validate_input(first_name):
-            return jsonify({'error': 'Invalid first name format'}), 400
-        if last_name and not validate_input(last_name):
-            return jsonify({'error': 'Invalid last name format'}), 400
+            # Validate if provided
+            if first_name and not validate_input(first_name):
+                count_event('invalid_input')
+                return jsonify({'error': 'Invalid first name format'}), 400
+            if last_name and not validate_input(last_name):
+                count_event('invalid_input')
+                return jsonify({'error': 'Invalid last name format'}), 400
+            locale = data.get('locale', config.NAME_DEFAULT_LOCALE)
+            if not validate_locale(locale):
+                count_event('invalid_input')
+                return jsonify({'error': f"Unsupported locale. Choose from: {', '.join(config.NAME_STYLES)}"}), 400
 
-        # Generate name
-        leprechaun_name = generate_leprechaun_name(first_name, last_name)
+        # Generate name from a fresh seed so it can be regenerated from its permalink
+        with timed('generate_name'):
+            seed, leprechaun_name, unique = draw_name(first_name, last_name, locale)
+        count_event('names_generated')
+        permalink = name_generator.encode_permalink(
+            seed, first_name, last_name, datetime.now().date(), locale, PERMALINK_KEY)
 
         # Prepare data for saving
         name_data = {
@@ -170,22 +456,198 @@ def generate_name():
         }
 
         # Save to database
-        success, message = save_to_database(name_data)
+        with timed('save_name'):
+            success, message = save_to_database(name_data)
         if not success:
+            count_event('name_save_errors')
             app.logger.warning(f"Failed to save name: {message}")
 
-        return jsonify({
+        response = {
             'leprechaunName': leprechaun_name,
+            'permalink': f'/n/{permalink}',
             'saveStatus': 'success' if success else 'warning',
             'saveMessage': message
-        })
+        }
+        if unique is not None:
+            response['unique'] = unique
+        return jsonify(response)
 
     except Exception as e:
         app.logger.error(f"Error in generate_name: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/generate/batch', methods=['POST'])
+@limiter.limit(config.RATE_LIMIT_NAME_BATCH)
+def generate_name_batch():
+    """Generate many leprechaun names in one request"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        count = data.get('count', 0)
+        people = data.get('people', [])
+        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+            return jsonify({'error': 'count must be a non-negative integer'}), 400
+        if not isinstance(people, list):
+            return jsonify({'error': 'people must be a list'}), 400
+        total = count + len(people)
+        if total == 0:
+            return jsonify({'error': 'No names requested'}), 400
+        if total > config.GENERATE_BATCH_MAX_NAMES:
+            return jsonify({'error': f'At most {config.GENERATE_BATCH_MAX_NAMES} names per request'}), 400
+        locale = data.get('locale', config.NAME_DEFAULT_LOCALE)
+        if not validate_locale(locale):
+            count_event('invalid_input')
+            return jsonify({'error': f"Unsupported locale. Choose from: {', '.join(config.NAME_STYLES)}"}), 400
+
+        # Sanitize and validate every person before generating anything
+        pairs = []
+        with timed('validate'):
+            for person in people:
+                if not isinstance(person, dict):
+                    count_event('invalid_input')
+                    return jsonify({'error': 'Each person must be an object'}), 400
+                first_name = sanitize_input(person.get('firstName', ''))
+                last_name = sanitize_input(person.get('lastName', ''))
+                if first_name and not validate_input(first_name):
+                    count_event('invalid_input')
+                    return jsonify({'error': 'Invalid first name format'}), 400
+                if last_name and not validate_input(last_name):
+                    count_event('invalid_input')
+                    return jsonify({'error': 'Invalid last name format'}), 400
+                pairs.append((first_name, last_name))
+
+        # Personalised names come first, followed by the random ones
+        inputs = pairs + [('', '')] * count
+        with timed('generate_name'):
+            leprechaun_names = name_generator.generate_names(count, pairs, locale)
+            duplicates = make_unique(leprechaun_names, inputs, locale) if name_filter_instance else None
+        count_event('names_generated', total)
+        timestamp = datetime.now().isoformat()
+        name_records = [
+            {
+                'firstName': first_name if first_name else 'Random',
+                'lastName': last_name if last_name else 'Random',
+                'leprechaunName': leprechaun_name,
+                'timestamp': timestamp,
+                'ip': request.remote_addr
+            }
+            for (first_name, last_name), leprechaun_name in zip(inputs, leprechaun_names)
+        ]
+
+        try:
+            with timed('save_name'):
+                first_index = name_cache.add_many(name_records)
+            if first_index is None:
+                success, message = True, "Names queued for saving"
+            else:
+                success, message = True, f"Names saved successfully (IDs: {first_index + 1}-{first_index + total})"
+        except Exception as e:
+            success, message = False, f"Error saving to database: {str(e)}"
+            count_event('name_save_errors', total)
+            app.logger.warning(f"Failed to save names: {message}")
+
+        response = {
+            'leprechaunNames': leprechaun_names,
+            'count': total,
+            'saveStatus': 'success' if success else 'warning',
+            'saveMessage': message
+        }
+        if duplicates is not None:
+            response['duplicates'] = duplicates
+        return jsonify(response)
+
+    except Exception as e:
+        app.logger.error(f"Error in generate_name_batch: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def decode_permalink(seed):
+    """
+    Regenerate a name from its permalink token
+
+    Returns:
+        (leprechaun name, issue date), or None if the token is invalid or not signed by this app
+    """
+    try:
+        seed_value, first_name, last_name, issued, locale = name_generator.decode_permalink(seed, PERMALINK_KEY)
+    except ValueError:
+        return None
+    if not validate_locale(locale):
+        return None
+    for part in (first_name, last_name):
+        if part and (sanitize_input(part) != part or not validate_input(part)):
+            return None
+    return name_generator.generate_leprechaun_name(first_name, last_name, seed_value, locale), issued
+
+def cacheable(response, seed):
+    """Mark a permalink response as immutable and answer conditional requests"""
+    response.headers['Cache-Control'] = f'public, max-age={config.PERMALINK_CACHE_MAX_AGE}, immutable'
+    response.set_etag(seed)
+    return response.make_conditional(request)
+
+@app.route('/n/<seed>')
+def permalink_name(seed):
+    """Regenerate a shared name from its permalink without touching the store"""
+    permalink = decode_permalink(seed)
+    if permalink is None:
+        return jsonify({'error': 'Unknown name link'}), 404
+
+    leprechaun_name, issued = permalink
+    return cacheable(jsonify({
+        'leprechaunName': leprechaun_name,
+        'issued': issued.isoformat(),
+        'certificate': f'/n/{seed}/certificate'
+    }), seed)
+
+def permalink_template():
+    """Template requested for a permalink certificate"""
+    template = request.args.get('template', 'classic-emerald')
+    return template if template in config.ALLOWED_TEMPLATES else 'classic-emerald'
+
+def certificate_needs_no_render():
+    """Exempt permalink certificates that are invalid or already in the PDF cache from the PDF generation limit"""
+    permalink = decode_permalink(request.view_args['seed'])
+    if permalink is None:
+        return True
+    if not pdf_cache_instance:
+        return False
+    leprechaun_name, issued = permalink
+    variant = pdf_cache_variant(permalink_template(), watermark_requested())
+    return pdf_cache_instance.contains(variant, leprechaun_name, issued.strftime('%B %d, %Y'))
+
+@app.route('/n/<seed>/certificate')
+@limiter.shared_limit(config.RATE_LIMIT_PDF_GENERATION, scope='pdf-render', exempt_when=certificate_needs_no_render)
+def permalink_certificate(seed):
+    """Render the certificate for a permalink, dated when the name was generated"""
+    try:
+        permalink = decode_permalink(seed)
+        if permalink is None:
+            return jsonify({'error': 'Unknown name link'}), 404
+
+        template = permalink_template()
+
+        leprechaun_name, issued = permalink
+        watermarked = watermark_requested()
+        try:
+            pdf_data, error = generate_pdf(leprechaun_name, template, issued.strftime('%B %d, %Y'), watermarked)
+        except render_pool.RenderPoolBusy:
+            return jsonify({'error': 'PDF generator is busy, please try again shortly'}), 503
+        if error:
+            return jsonify({'error': error}), 500
+
+        response = pdf_delivery.pdf_response(pdf_data, pdf_delivery.certificate_filename(issued), inline=True)
+        if config.PDF_WATERMARK_FREE:
+            # Free and premium clients get different bytes from the same URL
+            response.vary.add('Authorization')
+        return cacheable(response, f"{seed}-{template}{'-watermarked' if watermarked else ''}")
+
+    except Exception as e:
+        app.logger.error(f"Error in permalink_certificate: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/download-pdf', methods=['POST'])
-@limiter.limit(config.RATE_LIMIT_PDF_GENERATION)
+@limiter.shared_limit(config.RATE_LIMIT_PDF_GENERATION, scope='pdf-render')  # Shared with /preview cache misses
 def download_pdf():
     """Generate and download PDF certificate"""
     try:
@@ -198,25 +660,29 @@ def download_pdf():
 
         # Validate inputs
         if not name or not isinstance(name, str):
+            count_event('invalid_input')
             return jsonify({'error': 'Name is required'}), 400
 
-        name = sanitize_input(name)
-        if not validate_input(name):
-            return jsonify({'error': 'Invalid name format'}), 400
+        with timed('validate'):
+            name = sanitize_input(name)
+            if not validate_input(name):
+                count_event('invalid_input')
+                return jsonify({'error': 'Invalid name format'}), 400
 
         # Validate template
         if template not in config.ALLOWED_TEMPLATES:
             template = 'classic-emerald'
 
         # Generate PDF
-        pdf_data, error = generate_pdf(name, template)
+        try:
+            pdf_data, error = generate_pdf(name, template, watermarked=watermark_requested())
+        except render_pool.RenderPoolBusy:
+            return jsonify({'error': 'PDF generator is busy, please try again shortly'}), 503
         if error:
             return jsonify({'error': error}), 500
 
         # Create response
-        response = make_response(pdf_data)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename="leprechaun-certificate-{datetime.now().strftime("%Y%m%d")}.pdf"'
+        response = pdf_delivery.pdf_response(pdf_data, pdf_delivery.certificate_filename(datetime.now()))
 
         # Log download
         app.logger.info(f"PDF generated for name: {name}, template: {template}")
@@ -227,6 +693,269 @@ def download_pdf():
         app.logger.error(f"Error in download_pdf: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def parse_preview_request():
+    """
+    Validate the /preview query parameters
+
+    Returns:
+        (params, error) where params holds name, template, width, format, negotiated,
+        watermarked, date and the cache key (also the ETag), and error is a message or None
+    """
+    name = sanitize_input(request.args.get('name', ''))
+    if not validate_input(name):
+        return None, 'Invalid name format'
+
+    template = request.args.get('template', 'classic-emerald')
+    if template not in config.ALLOWED_TEMPLATES:
+        template = 'classic-emerald'
+
+    width = request.args.get('width', config.PREVIEW_DEFAULT_WIDTH, type=int)
+    if width not in config.PREVIEW_WIDTHS:
+        return None, f"Width must be one of: {', '.join(map(str, config.PREVIEW_WIDTHS))}"
+
+    image_format = request.args.get('format')
+    negotiated = image_format is None
+    if negotiated:
+        # WebP for clients that accept it, otherwise PNG
+        mimetypes = {pdf_preview.IMAGE_FORMATS[f][1]: f for f in config.PREVIEW_FORMATS}
+        image_format = mimetypes.get(request.accept_mimetypes.best_match(list(mimetypes)), config.PREVIEW_FORMATS[-1])
+    if image_format not in config.PREVIEW_FORMATS:
+        return None, f"Format must be one of: {', '.join(config.PREVIEW_FORMATS)}"
+
+    watermarked = watermark_requested()
+    date_str = datetime.now().strftime('%B %d, %Y')
+    key = preview_cache_instance.make_key(config.APP_VERSION, template, name, date_str, width, image_format, watermarked)
+    return {
+        'name': name,
+        'template': template,
+        'width': width,
+        'format': image_format,
+        'negotiated': negotiated,
+        'watermarked': watermarked,
+        'date': date_str,
+        'key': key
+    }, None
+
+def preview_needs_no_render():
+    """Exempt /preview requests that will not render a PDF from the PDF generation limit"""
+    if not preview_cache_instance:
+        return True
+    params, error = parse_preview_request()
+    return error is not None or request.if_none_match.contains(params['key']) or params['key'] in preview_cache_instance
+
+@app.route('/preview')
+@limiter.limit(config.RATE_LIMIT_PREVIEW)
+@limiter.shared_limit(config.RATE_LIMIT_PDF_GENERATION, scope='pdf-render', exempt_when=preview_needs_no_render)
+def preview():
+    """Low-resolution image of a certificate, rasterized from the (cached) PDF"""
+    try:
+        if not preview_cache_instance:
+            return jsonify({'error': 'Previews are not available'}), 501
+
+        params, error = parse_preview_request()
+        if error:
+            count_event('invalid_input')
+            return jsonify({'error': error}), 400
+        key = params['key']
+
+        # The key is known before rendering, so revalidations never touch the PDF pipeline
+        if request.if_none_match.contains(key):
+            response = Response(status=304)
+        else:
+            image = preview_cache_instance.get(key)
+            if image is None:
+                try:
+                    pdf_data, error = generate_pdf(params['name'], params['template'], params['date'], params['watermarked'])
+                except render_pool.RenderPoolBusy:
+                    return jsonify({'error': 'PDF generator is busy, please try again shortly'}), 503
+                if error:
+                    return jsonify({'error': error}), 500
+                with timed('preview'):
+                    image = pdf_preview.rasterize(pdf_data, params['width'], params['format'])
+                preview_cache_instance.put(key, image)
+            response = Response(image, mimetype=pdf_preview.IMAGE_FORMATS[params['format']][1])
+
+        response.set_etag(key)
+        response.headers['Cache-Control'] = f'public, max-age={config.PREVIEW_CACHE_MAX_AGE}'
+        if params['negotiated']:
+            response.vary.add('Accept')
+        if config.PDF_WATERMARK_FREE:
+            response.vary.add('Authorization')
+        return response
+
+    except Exception as e:
+        app.logger.error(f"Error in preview: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/download-pdf/batch', methods=['POST'])
+@limiter.limit(config.RATE_LIMIT_PDF_BATCH)
+def download_pdf_batch():
+    """Generate certificates for a list of names as a streamed ZIP or one multi-page PDF"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        names = data.get('names')
+        template = data.get('template', 'classic-emerald')
+        output_format = data.get('format', 'zip')
+
+        # Validate inputs
+        if not names or not isinstance(names, list):
+            return jsonify({'error': 'A list of names is required'}), 400
+        if len(names) > config.PDF_BATCH_MAX_NAMES:
+            return jsonify({'error': f'At most {config.PDF_BATCH_MAX_NAMES} names per batch'}), 400
+        if output_format not in config.PDF_BATCH_FORMATS:
+            return jsonify({'error': f"Format must be one of: {', '.join(config.PDF_BATCH_FORMATS)}"}), 400
+
+        clean_names = []
+        for index, name in enumerate(names):
+            if not isinstance(name, str):
+                return jsonify({'error': f'Invalid name at position {index + 1}'}), 400
+            name = sanitize_input(name)
+            if not validate_input(name):
+                return jsonify({'error': f'Invalid name format at position {index + 1}'}), 400
+            clean_names.append(name)
+
+        # Validate template
+        if template not in config.ALLOWED_TEMPLATES:
+            template = 'classic-emerald'
+
+        filename = f"leprechaun-certificates-{datetime.now().strftime('%Y%m%d')}"
+        app.logger.info(f"Batch PDF requested for {len(clean_names)} names, template: {template}, format: {output_format}")
+
+        watermarked = watermark_requested()
+        if output_format == 'pdf':
+            try:
+                pdf_data, error = generate_batch_pdf(clean_names, template, watermarked)
+            except render_pool.RenderPoolBusy:
+                return jsonify({'error': 'PDF generator is busy, please try again shortly'}), 503
+            if error:
+                return jsonify({'error': error}), 500
+
+            return pdf_delivery.pdf_response(pdf_data, f"{filename}.pdf")
+
+        # Stream the archive member by member as certificates finish rendering
+        archive = pdf_batch.stream_zip(
+            clean_names,
+            lambda name: generate_pdf_queued(name, template, watermarked),
+            concurrency=config.PDF_BATCH_CONCURRENCY
+        )
+        return Response(
+            archive,
+            mimetype='application/zip',
+            headers={'Content-Disposition': f'attachment; filename="{filename}.zip"'}
+        )
+
+    except Exception as e:
+        app.logger.error(f"Error in download_pdf_batch: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/pdf-jobs', methods=['POST'])
+@limiter.shared_limit(config.RATE_LIMIT_PDF_GENERATION, scope='pdf-render')  # Queued renders draw on the same budget
+def create_pdf_job():
+    """Queue a PDF certificate for background rendering"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        name = data.get('name', '')
+        template = data.get('template', 'classic-emerald')
+
+        # Validate inputs
+        if not name or not isinstance(name, str):
+            return jsonify({'error': 'Name is required'}), 400
+
+        name = sanitize_input(name)
+        if not validate_input(name):
+            return jsonify({'error': 'Invalid name format'}), 400
+
+        # Validate template
+        if template not in config.ALLOWED_TEMPLATES:
+            template = 'classic-emerald'
+
+        try:
+            job = pdf_job_queue.submit(name, template, watermark_requested())
+        except pdf_jobs.JobQueueFull:
+            return jsonify({'error': 'PDF generator is busy, please try again shortly'}), 503
+
+        response = jsonify(dict(job.to_dict(), statusUrl=f'/pdf-jobs/{job.id}', fileUrl=f'/pdf-jobs/{job.id}/file'))
+        response.headers['Location'] = f'/pdf-jobs/{job.id}'
+        return response, 202
+
+    except Exception as e:
+        app.logger.error(f"Error in create_pdf_job: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/pdf-jobs/<job_id>')
+def pdf_job_status(job_id):
+    """Get the status of a PDF job"""
+    job = pdf_job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/pdf-jobs/<job_id>/file')
+def pdf_job_file(job_id):
+    """Download the PDF produced by a finished job"""
+    job = pdf_job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error or 'PDF generation failed'}), 500
+    if job.status != 'done':
+        return jsonify({'error': 'Job not finished', 'status': job.status}), 409
+
+    return pdf_delivery.pdf_response(job.result, pdf_delivery.certificate_filename(datetime.now()))
+
+@app.route('/names')
+def list_names():
+    """Page or stream through generated names (admin only)"""
+    if not is_admin_request():
+        return jsonify({'error': 'Not found'}), 404
+
+    try:
+        filters, error = parse_name_filters(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+
+        try:
+            cursor = int(request.args.get('cursor', 0))
+            limit = int(request.args.get('limit', config.NAMES_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'cursor and limit must be integers'}), 400
+        if cursor < 0 or limit < 1:
+            return jsonify({'error': 'cursor must be >= 0 and limit >= 1'}), 400
+
+        matches = (
+            (seq, record) for seq, record in name_cache.iter_names(cursor)
+            if name_matches(record, filters)
+        )
+
+        # NDJSON mode streams every match from the cursor onwards
+        if request.args.get('format') == 'ndjson':
+            lines = (json.dumps(public_name_record(seq, record)) + '\n' for seq, record in matches)
+            return Response(lines, mimetype='application/x-ndjson')
+
+        limit = min(limit, config.NAMES_MAX_PAGE_SIZE)
+        page = []
+        next_cursor = None
+        for seq, record in matches:
+            if len(page) == limit:
+                next_cursor = seq
+                break
+            page.append(public_name_record(seq, record))
+
+        return jsonify({
+            'names': page,
+            'nextCursor': str(next_cursor) if next_cursor is not None else None
+        })
+
+    except Exception as e:
+        app.logger.error(f"Error in list_names: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/stats')
 def stats():
     """Get application statistics"""
@@ -240,14 +969,28 @@ def stats():
             'templatesAvailable': config.ALLOWED_TEMPLATES,
             'rateLimits': {
                 'nameGeneration': config.RATE_LIMIT_NAME_GENERATION,
-                'pdfGeneration': config.RATE_LIMIT_PDF_GENERATION
-            }
+                'pdfGeneration': config.RATE_LIMIT_PDF_GENERATION,
+                'strategy': config.RATE_LIMIT_STRATEGY
+            },
+            'pdfCache': pdf_cache_instance.stats() if pdf_cache_instance else None,
+            'previewCache': preview_cache_instance.stats() if preview_cache_instance else None,
+            'pdfJobs': pdf_job_queue.stats(),
+            'names': name_statistics.summary(config.STATS_TOP_NAMES),
+            'uniqueNames': name_filter_instance.stats() if name_filter_instance else None
         })
 
     except Exception as e:
         app.logger.error(f"Error in stats: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/metrics')
+@limiter.exempt
+def metrics_endpoint():
+    """Stage timing histograms and counters in Prometheus text format"""
+    if not metrics_instance:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics_instance.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
@@ -275,6 +1018,30 @@ def internal_error(error):
     app.logger.error(f"Internal server error: {str(error)}")
     return jsonify({'error': 'Internal server error'}), 500
 
+def before_fork():
+    """Release the name store in a preloaded parent so each forked worker can take it over"""
+    name_cache.stop()
+
+def after_fork():
+    """Reinitialize per-process state in a worker forked from a preloaded parent"""
+    # Templates, compiled name tables and the render pool survive fork or restart lazily;
+    # the name store must be reloaded and its writer threads restarted
+    name_cache.reopen_after_fork()
+
+def shutdown(stop_store_service=False):
+    """
+    Flush pending names and stop background workers
+
+    Args:
+        stop_store_service: Also stop the store service if this process started it
+    """
+    pdf_jobs.stop_job_queue()
+    if metrics_instance:
+        metrics_instance.flush()
+    cache.stop_cache()
+    store_service.stop_store_client(stop_store_service)
+    render_pool.stop_render_pool()
+
 # Application startup
 if __name__ == '__main__':
     print(f"Starting {config.APP_NAME} v{config.APP_VERSION}")
@@ -283,6 +1050,10 @@ if __name__ == '__main__':
     print(f"Rate limiting: {config.RATE_LIMIT_NAME_GENERATION} for name generation")
     print(f"Security headers: {len(config.SECURITY_HEADERS)} configured")
 
+    if metrics_instance and config.METRICS_DIR:
+        # Snapshots left by earlier runs would be summed into this one's
+        metrics.reset_shared_dir(config.METRICS_DIR)
+
     # Configure logging
     import logging
     logging.basicConfig(
@@ -291,10 +1062,19 @@ if __name__ == '__main__':
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
-    # Run application
-    app.run(
-        host='0.0.0.0',
-        port=5000,
-        debug=config.DEBUG,
-        threaded=True
-    )
+    # Turn SIGTERM into a normal exit so pending names are flushed
+    def handle_sigterm(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    # Run application (use gunicorn -c gunicorn.conf.py app_secure:app in production)
+    try:
+        app.run(
+            host='0.0.0.0',
+            port=5000,
+            debug=config.DEBUG,
+            use_reloader=False,  # A reloader child would wait forever for the name store lock
+            threaded=True
+        )
+    finally:
+        shutdown(stop_store_service=True)
@@ -0,0 +1,151 @@
+"""
+Offline asset bundle for Leprechaun Name Generator
+Serves vendored fonts to WeasyPrint so certificate renders never touch the network
+"""
+
+import mimetypes
+import os
+import re
+import threading
+from urllib.parse import unquote, unquote_plus, urlparse
+from urllib.request import pathname2url
+
+from weasyprint import default_url_fetcher
+
+import config
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+FONT_DIR = os.path.join(ASSET_DIR, 'fonts')
+GOOGLE_FONTS_LINK_RE = re.compile(r'<link\b[^>]*\bhref="(https?://fonts\.googleapis\.com/css2?\?[^"]*)"[^>]*>')
+FONT_SRC_RE = re.compile(r"url\('([^']+)'\)")
+
+def family_stylesheet(family):
+    """Path of the vendored stylesheet for a font family ('Open Sans' -> assets/fonts/open-sans.css)"""
+    return os.path.join(FONT_DIR, family.lower().replace(' ', '-') + '.css')
+
+def missing_font_files(family):
+    """Font files referenced by a family's vendored stylesheet that are not in the bundle"""
+    css_path = family_stylesheet(family)
+    try:
+        with open(css_path, 'r') as f:
+            sources = sorted(set(FONT_SRC_RE.findall(f.read())))
+    except OSError:
+        return [os.path.basename(css_path)]
+    return [source for source in sources if not os.path.isfile(os.path.join(FONT_DIR, source))]
+
+_bundled_families = {}  # family -> every font file present (checked once per process)
+
+def family_bundled(family):
+    """Whether every font file of a family is vendored"""
+    if family not in _bundled_families:
+        missing = missing_font_files(family)
+        _bundled_families[family] = not missing
+        if missing:
+            source = 'fonts.googleapis.com' if config.PDF_ALLOW_NETWORK_ASSETS else 'the CSS fallback fonts'
+            print(f"Warning: font family {family} is not bundled (missing {', '.join(missing)}); "
+                  f"certificates use {source} for it. Run assets/fetch_fonts.py and commit the fonts.")
+    return _bundled_families[family]
+
+def local_url(path):
+    """Build a file:// URL for a local path"""
+    return 'file://' + pathname2url(os.path.abspath(path))
+
+def _rewrite_font_link(match):
+    """Replace one Google Fonts stylesheet link with a link per vendored family"""
+    base, _, query = match.group(1).partition('?')
+    params = query.split('&')
+    links = []
+    remote = []
+    for param in params:
+        if not param.startswith('family='):
+            continue
+        family = unquote_plus(param[len('family='):].split(':')[0])
+        if family_bundled(family):
+            links.append(f'<link href="{local_url(family_stylesheet(family))}" rel="stylesheet">')
+        else:
+            remote.append(param)
+
+    # Families missing from the bundle only reach the network when it is allowed
+    if remote and config.PDF_ALLOW_NETWORK_ASSETS:
+        options = [param for param in params if not param.startswith('family=')]
+        links.append(f'<link href="{base}?{"&".join(remote + options)}" rel="stylesheet">')
+    return '\n    '.join(links)
+
+def rewrite_asset_urls(html_content):
+    """Point Google Fonts stylesheet links at the vendored font stylesheets"""
+    return GOOGLE_FONTS_LINK_RE.sub(_rewrite_font_link, html_content)
+
+class CachingURLFetcher:
+    """
+    WeasyPrint url_fetcher that serves the asset bundle from memory
+    """
+
+    def __init__(self, asset_dir=ASSET_DIR, allow_network=False):
+        """
+        Initialize the fetcher
+
+        Args:
+            asset_dir: Directory local file URLs are restricted to
+            allow_network: Fall back to fetching remote URLs (cached after the first fetch)
+        """
+        self.asset_dir = os.path.abspath(asset_dir)
+        self.allow_network = allow_network
+        self.cache = {}  # url -> fetch result
+        self.lock = threading.Lock()
+
+    def _fetch_file(self, url):
+        """Read a file inside the asset bundle"""
+        path = os.path.abspath(unquote(urlparse(url).path))
+        if not path.startswith(self.asset_dir + os.sep):
+            raise ValueError(f"Refusing to load file outside the asset bundle: {url}")
+        with open(path, 'rb') as f:
+            data = f.read()
+        return {
+            'string': data,
+            'mime_type': mimetypes.guess_type(path)[0] or 'application/octet-stream',
+            'redirected_url': url
+        }
+
+    def _fetch_remote(self, url):
+        """Fetch a remote URL into memory"""
+        result = default_url_fetcher(url)
+        if 'file_obj' in result:
+            result['string'] = result.pop('file_obj').read()
+        return result
+
+    def __call__(self, url, timeout=10, ssl_context=None):
+        """Fetch a URL for WeasyPrint"""
+        if url.startswith('data:'):
+            return default_url_fetcher(url)
+
+        with self.lock:
+            cached = self.cache.get(url)
+        if cached is not None:
+            return dict(cached)
+
+        scheme = urlparse(url).scheme
+        if scheme == 'file':
+            result = self._fetch_file(url)
+        elif self.allow_network:
+            result = self._fetch_remote(url)
+        else:
+            raise ValueError(f"Network fetch blocked, asset is not bundled: {url}")
+
+        with self.lock:
+            self.cache[url] = result
+        return dict(result)
+
+    def clear(self):
+        """Drop all cached assets"""
+        with self.lock:
+            self.cache.clear()
+
+# Global fetcher instance, shared by every render in this process
+_url_fetcher = None
+
+def get_url_fetcher():
+    """Get the process-wide caching url_fetcher"""
+    global _url_fetcher
+    if _url_fetcher is None:
+        _url_fetcher = CachingURLFetcher(allow_network=config.PDF_ALLOW_NETWORK_ASSETS)
+    return _url_fetcher
@@ -0,0 +1,100 @@
+"""
+Maintainer tool: download the fonts referenced by the stylesheets in assets/fonts into the asset bundle
+Run when vendoring or updating fonts, then commit the TTF files: python assets/fetch_fonts.py --force
+Without CDN access, cut a family from a variable TTF instead: python assets/fetch_fonts.py --variable open-sans PATH
+Deployments never run this; they render from the committed files.
+"""
+
+import os
+import sys
+import urllib.request
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+FONTSOURCE_URL = 'https://cdn.jsdelivr.net/fontsource/fonts/{family}@latest/latin-{weight}-normal.ttf'
+
+# Local file name -> (fontsource family id, weight)
+FONT_FILES = {
+    'LuckiestGuy-Regular.ttf': ('luckiest-guy', 400),
+    'IrishGrover-Regular.ttf': ('irish-grover', 400),
+    'OpenSans-Regular.ttf': ('open-sans', 400),
+    'OpenSans-Medium.ttf': ('open-sans', 500),
+    'OpenSans-Bold.ttf': ('open-sans', 700),
+    'OpenSans-ExtraBold.ttf': ('open-sans', 800),
+}
+
+# Latin and Latin Extended-A, enough for every name list in config.NAME_STYLES
+LATIN_UNICODES = list(range(0x20, 0x7F)) + list(range(0xA0, 0x180)) + list(range(0x2000, 0x2070)) + [0x20AC, 0x2122]
+
+
+def instance_variable_font(family, variable_path, force=False):
+    """
+    Write static instances of a variable font for every FONT_FILES entry of a family
+
+    Args:
+        family: Fontsource family id (e.g. 'open-sans')
+        variable_path: Path to the family's variable TTF (wght axis, optional wdth axis)
+        force: Overwrite files that already exist
+
+    Returns:
+        Number of files that could not be written
+    """
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+    from fontTools.varLib import instancer
+
+    failures = 0
+    for filename, (file_family, weight) in FONT_FILES.items():
+        if file_family != family:
+            continue
+        path = os.path.join(FONT_DIR, filename)
+        if os.path.exists(path) and not force:
+            print(f"Already present: {filename}")
+            continue
+
+        try:
+            font = TTFont(variable_path)
+            axes = {axis.axisTag: axis.defaultValue for axis in font['fvar'].axes}
+            axes['wght'] = weight
+            static = instancer.instantiateVariableFont(font, axes, updateFontNames=True)
+            subsetter = subset.Subsetter(subset.Options())
+            subsetter.populate(unicodes=LATIN_UNICODES)
+            subsetter.subset(static)
+            static.save(path)
+            print(f"Wrote {filename} ({os.path.getsize(path)} bytes)")
+        except Exception as e:
+            print(f"Error instancing {filename} from {variable_path}: {e}")
+            failures += 1
+
+    return failures
+
+
+def main():
+    force = '--force' in sys.argv
+    if '--variable' in sys.argv:
+        index = sys.argv.index('--variable')
+        family, variable_path = sys.argv[index + 1:index + 3]
+        return 1 if instance_variable_font(family, variable_path, force) else 0
+
+    failures = 0
+    for filename, (family, weight) in FONT_FILES.items():
+        path = os.path.join(FONT_DIR, filename)
+        if os.path.exists(path) and not force:
+            print(f"Already present: {filename}")
+            continue
+
+        url = FONTSOURCE_URL.format(family=family, weight=weight)
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                data = response.read()
+            with open(path, 'wb') as f:
+                f.write(data)
+            print(f"Downloaded {filename} ({len(data)} bytes)")
+        except Exception as e:
+            print(f"Error downloading {filename} from {url}: {e}")
+            failures += 1
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Benchmark: end-to-end HTTP throughput and latency of app_secure
+Serves app_secure.app locally (in a scratch directory, rate limits off) and drives /generate,
+/download-pdf, /stats and /health at a configurable concurrency, writing a JSON report.
+A report can be compared against a baseline to catch regressions.
+
+Run from the project root:
+    python benchmarks/bench_http.py [--concurrency 8] [--duration 10] [--output report.json]
+    python benchmarks/bench_http.py --baseline baseline.json       # run, then compare
+    python benchmarks/bench_http.py --compare baseline.json report.json   # compare two reports
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import string
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Read-only project directories the app resolves relative to its working directory
+SHARED_DIRS = ['pdf-templates', 'templates', 'assets']
+
+
+def random_name():
+    """A valid name that is unlikely to be in the PDF cache"""
+    letters = ''.join(random.choice(string.ascii_lowercase) for _ in range(8))
+    return f"Finn {letters.capitalize()}"
+
+
+def endpoint_requests(unique_pdf_names):
+    """Request factories per endpoint: () -> (method, path, body)"""
+    return {
+        'generate': lambda: ('POST', '/generate', {'firstName': 'Finn', 'lastName': 'Kelly'}),
+        'download-pdf': lambda: ('POST', '/download-pdf', {
+            'name': random_name() if unique_pdf_names else 'Finn Kelly',
+            'template': 'classic-emerald'
+        }),
+        'stats': lambda: ('GET', '/stats', None),
+        'health': lambda: ('GET', '/health', None),
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def start_local_server():
+    """Serve app_secure from a scratch directory; returns (host, port, shutdown)"""
+    work_dir = tempfile.mkdtemp(prefix='bench-http-')
+    for name in SHARED_DIRS:
+        os.symlink(os.path.join(ROOT, name), os.path.join(work_dir, name))
+    os.chdir(work_dir)  # names.json, logs and rate-limit state go here, not into the project
+
+    from werkzeug.serving import make_server
+    import app_secure
+
+    app_secure.limiter.enabled = False  # Measure the app, not the 429 path
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No access log line per request
+    server = make_server('127.0.0.1', 0, app_secure.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def shutdown():
+        server.shutdown()
+        app_secure.shutdown(stop_store_service=True)
+        os.chdir(ROOT)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return '127.0.0.1', server.server_port, shutdown
+
+
+def drive(host, port, make_request, concurrency, duration, warmup):
+    """Hit one endpoint from `concurrency` threads; returns latency samples and status counts"""
+    samples = []
+    statuses = {}
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+
+    def client():
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        local_samples, local_statuses = [], {}
+
+        def one():
+            method, path, body = make_request()
+            payload = json.dumps(body) if body is not None else None
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            began = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+                if response.will_close:
+                    conn.close()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                with lock:
+                    errors.append(str(e))
+                return None, None
+            return (time.perf_counter() - began) * 1000, status
+
+        for _ in range(warmup):
+            one()
+        start_barrier.wait()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            latency, status = one()
+            if latency is not None:
+                local_samples.append(latency)
+                local_statuses[status] = local_statuses.get(status, 0) + 1
+        conn.close()
+        with lock:
+            samples.extend(local_samples)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    return samples, statuses, errors, elapsed
+
+
+def summarize(samples, statuses, errors, elapsed):
+    ok = sum(count for status, count in statuses.items() if 200 <= status < 300)
+    result = {
+        'requests': len(samples),
+        'ok': ok,
+        'statusCodes': {str(status): count for status, count in sorted(statuses.items())},
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+    }
+    if samples:
+        result['latencyMs'] = {
+            'mean': round(sum(samples) / len(samples), 3),
+            'p50': round(percentile(samples, 50), 3),
+            'p95': round(percentile(samples, 95), 3),
+            'p99': round(percentile(samples, 99), 3),
+            'max': round(max(samples), 3),
+        }
+    return result
+
+
+def compare(baseline, current, threshold):
+    """
+    Print per-endpoint changes and return the regressions
+
+    A regression is throughput falling, or p95/p99 latency rising, by more than threshold.
+    """
+    regressions = []
+    print(f"\n{'endpoint':>14} {'metric':>11} {'baseline':>11} {'current':>11} {'change':>9}")
+    for endpoint, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(endpoint)
+        if not before or 'latencyMs' not in before or 'latencyMs' not in now:
+            print(f"{endpoint:>14} {'(no baseline)':>11}")
+            continue
+        metrics = [
+            ('throughput', before['throughput'], now['throughput'], -1),
+            ('p95 ms', before['latencyMs']['p95'], now['latencyMs']['p95'], 1),
+            ('p99 ms', before['latencyMs']['p99'], now['latencyMs']['p99'], 1),
+        ]
+        for metric, old, new, worse_sign in metrics:
+            change = (new - old) / old if old else 0.0
+            regressed = change * worse_sign > threshold
+            if regressed:
+                regressions.append(f"{endpoint} {metric}")
+            print(f"{endpoint:>14} {metric:>11} {old:>11.2f} {new:>11.2f} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HTTP benchmark for app_secure")
+    parser.add_argument('--endpoints', default='generate,download-pdf,stats,health',
+                        help="Comma-separated endpoints to drive")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent client connections")
+    parser.add_argument('--duration', type=float, default=10, help="Seconds per endpoint")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed requests per connection first")
+    parser.add_argument('--unique-pdf-names', action='store_true', help="Vary PDF names to bypass the PDF cache")
+    parser.add_argument('--url', help="Benchmark a running server (host:port) instead of starting one")
+    parser.add_argument('--output', help="Write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', help="Compare the new report against this one")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help="Only compare two reports")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        print(f"\n{len(regressions)} regressions" + (f": {', '.join(regressions)}" if regressions else ''))
+        return 1 if regressions else 0
+
+    requests = endpoint_requests(args.unique_pdf_names)
+    endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = [name for name in endpoints if name not in requests]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)} (choose from {', '.join(requests)})")
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    if args.url:
+        host, _, port = args.url.rpartition(':')
+        port, shutdown = int(port), None
+    else:
+        host, port, shutdown = start_local_server()
+
+    report = {
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'server': args.url or 'local werkzeug (threaded)',
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'uniquePdfNames': args.unique_pdf_names,
+        'endpoints': {},
+    }
+    try:
+        for endpoint in endpoints:
+            print(f"Driving {endpoint} for {args.duration}s at concurrency {args.concurrency}...", file=sys.stderr)
+            result = drive(host, port, requests[endpoint], args.concurrency, args.duration, args.warmup)
+            report['endpoints'][endpoint] = summarize(*result)
+    finally:
+        if shutdown:
+            shutdown()
+
+    text = json.dumps(report, indent=2)
+    if output_path:
+        with open(output_path, 'w') as f:
+            f.write(text + '\n')
+        print(f"Report written to {output_path}", file=sys.stderr)
+    else:
+        print(text)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        print(f"\n{len(regressions)} regressions" + (f": {', '.join(regressions)}" if regressions else ''))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
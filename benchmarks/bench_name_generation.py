@@ -0,0 +1,88 @@
+"""
+Benchmark: names per second, per-call generation + add() vs batched generation + add_many()
+The per-call path is what /generate does once per request; the batch path is /generate/batch.
+Run from the project root: python benchmarks/bench_name_generation.py [batch sizes...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache
+import config
+import name_generator
+import name_grammar
+
+
+def make_record(first_name, last_name, leprechaun_name):
+    return {
+        'firstName': first_name or 'Random',
+        'lastName': last_name or 'Random',
+        'leprechaunName': leprechaun_name,
+        'timestamp': datetime.now().isoformat(),
+        'ip': '127.0.0.1'
+    }
+
+
+def people_for(size):
+    """Half personalised, half random, like a mixed workload"""
+    return [('Finn', f'Kelly{i}') if i % 2 else ('', '') for i in range(size)]
+
+
+def per_call(name_cache, people):
+    for first_name, last_name in people:
+        leprechaun_name = name_generator.generate_leprechaun_name(first_name, last_name)
+        name_cache.add(make_record(first_name, last_name, leprechaun_name))
+
+
+def batched(name_cache, people):
+    personalised = [pair for pair in people if pair[0] and pair[1]]
+    count = len(people) - len(personalised)
+    names = name_generator.generate_names(count, personalised)
+    inputs = personalised + [('', '')] * count
+    timestamp = datetime.now().isoformat()
+    name_cache.add_many([
+        {
+            'firstName': first_name or 'Random',
+            'lastName': last_name or 'Random',
+            'leprechaunName': leprechaun_name,
+            'timestamp': timestamp,
+            'ip': '127.0.0.1'
+        }
+        for (first_name, last_name), leprechaun_name in zip(inputs, names)
+    ])
+
+
+def run(path, size, rounds=5):
+    """Best names/second over several rounds"""
+    best = 0
+    for _ in range(rounds):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            name_cache = cache.NameDatabaseCache(os.path.join(tmp_dir, 'names.json'), 3600, 3600)
+            people = people_for(size)
+            start = time.perf_counter()
+            path(name_cache, people)
+            elapsed = time.perf_counter() - start
+            name_cache.stop()
+        best = max(best, size / elapsed)
+    return best
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000]
+    name_grammar.init_name_engine(config.NAME_STYLES, config.NAME_DEFAULT_LOCALE)
+    print(f"NumPy: {'yes' if name_grammar.numpy is not None else 'no (random.choices fallback)'}")
+
+    print(f"\n{'names':>8} {'per-call/s':>12} {'batch/s':>12} {'speedup':>8}")
+    for size in sizes:
+        single = run(per_call, size)
+        batch = run(batched, size)
+        print(f"{size:>8} {single:>12.0f} {batch:>12.0f} {batch / single:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: memory per name record, list of dicts vs ColumnarRecordStore
+Run from the project root: python benchmarks/bench_record_memory.py [records]
+"""
+
+import json
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from records import ColumnarRecordStore
+
+
+def make_records(count):
+    """Records shaped like the ones /generate saves"""
+    rng = random.Random(17)
+    start = datetime(2026, 3, 1)
+    records = []
+    for i in range(count):
+        first = rng.choice(config.FIRST_NAMES)
+        last = rng.choice(config.LAST_NAMES)
+        records.append({
+            'firstName': first,
+            'lastName': last,
+            'leprechaunName': f"{first} {rng.choice(['Mc', 'O', 'Fitz'])}{last}",
+            'timestamp': (start + timedelta(seconds=i * 7, microseconds=rng.randrange(10 ** 6))).isoformat(),
+            'ip': f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+        })
+    return records
+
+
+def measure(build, payload):
+    """Bytes allocated by build(payload) that are still live afterwards"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(payload)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # Both layouts are built from JSON text, as they are when names.json is loaded
+    payload = json.dumps(make_records(count))
+
+    dict_bytes, as_dicts = measure(json.loads, payload)
+    columnar_bytes, columnar = measure(lambda text: ColumnarRecordStore(json.loads(text)), payload)
+
+    assert columnar[:] == as_dicts, "columnar rows differ from the source records"
+
+    print(f"Records: {count}")
+    print(f"List of dicts:  {dict_bytes / count:8.1f} bytes/record")
+    print(f"Columnar store: {columnar_bytes / count:8.1f} bytes/record")
+    print(f"Reduction:      {dict_bytes / columnar_bytes:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: latency of the name store's request path while snapshots are written
+Measures NameDatabaseCache.add() + get_count() (what /generate does per request)
+with continuous compaction running, for increasing database sizes.
+Run from the project root: python benchmarks/bench_save_latency.py [sizes...]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache
+
+
+def make_record(i):
+    return {
+        'firstName': 'Finn',
+        'lastName': f'Kelly{i}',
+        'leprechaunName': f'Finn McKelly{i}',
+        'timestamp': '2026-03-17T12:00:00.000000',
+        'ip': '127.0.0.1'
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def run(size, requests=5000):
+    """Return (p50, p99, max) request-path latency in microseconds and snapshots written"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = os.path.join(tmp_dir, 'names.json')
+        with open(db_file, 'w') as f:
+            json.dump([make_record(i) for i in range(size)], f)
+
+        # Long intervals: flushes and snapshots are driven explicitly below
+        name_cache = cache.NameDatabaseCache(db_file, auto_save_interval=3600, log_flush_interval=3600)
+        snapshots = 0
+        stop = threading.Event()
+
+        def saver():
+            nonlocal snapshots
+            while not stop.is_set():
+                name_cache.save_now()
+                snapshots += 1
+
+        thread = threading.Thread(target=saver)
+        thread.start()
+
+        samples = []
+        for i in range(requests):
+            start = time.perf_counter()
+            name_cache.add(make_record(size + i))
+            name_cache.get_count()
+            samples.append((time.perf_counter() - start) * 1e6)
+            if i % 100 == 0:
+                time.sleep(0.001)  # Let the saver thread run between bursts
+
+        stop.set()
+        thread.join()
+        name_cache.stop()
+        return percentile(samples, 50), percentile(samples, 99), max(samples), snapshots
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    results = [(size, run(size)) for size in sizes]
+
+    print(f"\n{'records':>10} {'p50 us':>10} {'p99 us':>10} {'max us':>10} {'snapshots':>10}")
+    for size, (p50, p99, worst, snapshots) in results:
+        print(f"{size:>10} {p50:>10.1f} {p99:>10.1f} {worst:>10.1f} {snapshots:>10}")
+
+
+if __name__ == '__main__':
+    main()
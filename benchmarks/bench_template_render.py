@@ -0,0 +1,46 @@
+"""
+Micro-benchmark: per-certificate render cost of raw vs pre-parsed templates
+Run from the project root: python benchmarks/bench_template_render.py [iterations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import template_loader
+
+
+def time_renders(render, iterations):
+    """Return mean milliseconds per render after one warm-up call"""
+    render()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    loader = template_loader.TemplateLoader(config.PDF_TEMPLATE_DIR)
+    date_str = 'March 17, 2026'
+
+    print(f"{'template':<18} {'raw ms':>10} {'prepared ms':>12} {'speedup':>8}")
+    for template_name in config.ALLOWED_TEMPLATES:
+        raw = loader.get_template(template_name)
+        prepared = loader.prepared.get(template_name)
+        if not raw or not prepared:
+            print(f"{template_name:<18} skipped (template not loaded)")
+            continue
+
+        raw_ms = time_renders(
+            lambda: template_loader.render_certificate(raw, 'Finn McShamrock', date_str), iterations)
+        prepared_ms = time_renders(
+            lambda: prepared.render('Finn McShamrock', date_str), iterations)
+        print(f"{template_name:<18} {raw_ms:>10.1f} {prepared_ms:>12.1f} {raw_ms / prepared_ms:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
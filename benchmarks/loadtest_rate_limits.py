@@ -0,0 +1,90 @@
+"""
+Load test: do rate limits hold when requests are spread across worker processes?
+Starts N processes, each with its own Flask app and Limiter (as gunicorn workers would have),
+and hammers one limited route from the same client address in all of them at once.
+Run from the project root: python benchmarks/loadtest_rate_limits.py [workers] [requests per worker]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LIMIT = 20  # Requests allowed per minute on the test route
+
+
+def worker(storage_uri, strategy, requests, start, results):
+    from flask import Flask
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
+
+    import rate_limit_storage  # noqa: F401  Registers sqlite://
+
+    app = Flask(__name__)
+    limiter = Limiter(get_remote_address, app=app, storage_uri=storage_uri, strategy=strategy)
+
+    @app.route('/limited')
+    @limiter.limit(f"{LIMIT} per minute")
+    def limited():
+        return 'ok'
+
+    client = app.test_client()
+    start.wait()
+    allowed = 0
+    began = time.perf_counter()
+    for _ in range(requests):
+        if client.get('/limited').status_code == 200:
+            allowed += 1
+    results.put((allowed, time.perf_counter() - began))
+
+
+def run(storage_uri, strategy, workers, requests):
+    """Return (requests allowed in total, requests per second)"""
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(storage_uri, strategy, requests, start, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(1)  # Let every worker build its app before the burst
+    start.set()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    allowed = sum(count for count, _ in outcomes)
+    rate = workers * requests / max(elapsed for _, elapsed in outcomes)
+    return allowed, rate
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shared = f"sqlite:///{os.path.join(tmp_dir, 'ratelimits.db')}"
+        setups = [
+            ('memory://', 'fixed-window'),
+            (shared, 'sliding-window-counter'),
+            (shared, 'moving-window'),
+            (shared, 'fixed-window'),
+        ]
+
+        print(f"{workers} workers x {requests} requests, limit {LIMIT} per minute\n")
+        print(f"{'storage':>10} {'strategy':>24} {'allowed':>8} {'req/s':>8}  result")
+        failed = False
+        for storage_uri, strategy in setups:
+            allowed, rate = run(storage_uri, strategy, workers, requests)
+            holds = allowed <= LIMIT
+            failed |= storage_uri != 'memory://' and not holds
+            print(f"{storage_uri.split(':')[0]:>10} {strategy:>24} {allowed:>8} {rate:>8.0f}  "
+                  f"{'limit held' if holds else f'limit exceeded {allowed / LIMIT:.1f}x'}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Soak test: do disk usage and RSS stay flat over many PDF downloads?
+Downloads certificates repeatedly through app.py (/api/generate-pdf) and app_secure (/download-pdf)
+in this process, rendering in-process, and samples RSS and the scratch directory (including the
+temp dir) as it goes. Fails if either keeps growing once the PDF cache has filled.
+Run from the project root: python benchmarks/soak_pdf_downloads.py [downloads] [--app app_secure]
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Read-only project directories the apps resolve relative to their working directory
+SHARED_DIRS = ['pdf-templates', 'templates', 'assets']
+
+SAMPLES = 20  # RSS and disk samples per run
+
+
+def rss_bytes():
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Peak RSS only, which still exposes steady growth
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def disk_usage(path):
+    """(files, bytes) under path, not following the shared symlinks"""
+    files = size = 0
+    for dir_path, dir_names, file_names in os.walk(path):
+        for file_name in file_names:
+            file_path = os.path.join(dir_path, file_name)
+            if not os.path.islink(file_path):
+                files += 1
+                size += os.path.getsize(file_path)
+    return files, size
+
+
+def legacy_request(i, names):
+    return '/api/generate-pdf', {'leprechaun_name': names[i % len(names)], 'template': 'classic-emerald'}
+
+
+def secure_request(i, names):
+    return '/download-pdf', {'name': names[i % len(names)], 'template': 'classic-emerald'}
+
+
+def load_app(app_name):
+    """Import an app with its render pool off, so renders (and any leaks) happen in this process"""
+    import config
+    config.PDF_RENDER_POOL_ENABLED = False
+    if app_name == 'app':
+        import app
+        return app.app, legacy_request
+    import app_secure
+    app_secure.limiter.enabled = False
+    return app_secure.app, secure_request
+
+
+def soak(app_name, downloads, distinct_names, work_dir):
+    """Run the downloads and return [(downloads done, rss, files, bytes)] samples"""
+    flask_app, make_request = load_app(app_name)
+    client = flask_app.test_client()
+    names = [f"Finn McSoak {chr(65 + i // 26 % 26)}{chr(65 + i % 26)}" for i in range(distinct_names)]
+    every = max(downloads // SAMPLES, 1)
+    samples = []
+
+    for i in range(downloads):
+        path, body = make_request(i, names)
+        response = client.post(path, json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        length = int(response.headers.get('Content-Length', -1))
+        data = response.get_data()  # Read the whole body, as a client would
+        if length != len(data):
+            raise RuntimeError(f"Content-Length {length} does not match the {len(data)} bytes sent")
+        response.close()
+        if (i + 1) % every == 0:
+            files, size = disk_usage(work_dir)
+            samples.append((i + 1, rss_bytes(), files, size))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak PDF downloads and check disk and RSS stay flat")
+    parser.add_argument('downloads', nargs='?', type=int, default=10000, help="Downloads to perform")
+    parser.add_argument('--app', choices=['app', 'app_secure'], default='app_secure', help="Application to soak")
+    parser.add_argument('--names', type=int, default=50, help="Distinct certificate names, cycled")
+    parser.add_argument('--warmup', type=float, default=0.25, help="Fraction of the run before growth is measured")
+    parser.add_argument('--rss-tolerance-mb', type=float, default=16, help="RSS growth allowed after warm-up")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='soak-pdf-')
+    for name in SHARED_DIRS:
+        os.symlink(os.path.join(ROOT, name), os.path.join(work_dir, name))
+    tmp_dir = os.path.join(work_dir, 'tmp')
+    os.mkdir(tmp_dir)
+    tempfile.tempdir = tmp_dir  # Any temp file the app leaves behind is counted below
+    os.chdir(work_dir)
+
+    try:
+        began = time.perf_counter()
+        samples = soak(args.app, args.downloads, args.names, work_dir)
+        elapsed = time.perf_counter() - began
+        tmp_files = os.listdir(tmp_dir)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{args.app}: {args.downloads} downloads of {args.names} names in {elapsed:.1f}s "
+          f"({args.downloads / elapsed:.0f}/s)\n")
+    print(f"{'downloads':>10} {'rss MB':>9} {'files':>7} {'disk KB':>9}")
+    for done, rss, files, size in samples:
+        print(f"{done:>10} {rss / 2**20:>9.1f} {files:>7} {size / 1024:>9.1f}")
+
+    # Compare the end of the run against the first sample after warm-up
+    baseline = next(sample for sample in samples if sample[0] >= args.downloads * args.warmup)
+    final = samples[-1]
+    rss_growth = (final[1] - baseline[1]) / 2**20
+    file_growth = final[2] - baseline[2]
+    disk_growth = final[3] - baseline[3]
+    print(f"\nAfter warm-up: RSS {rss_growth:+.1f} MB, {file_growth:+d} files, {disk_growth / 1024:+.1f} KB on disk, "
+          f"{len(tmp_files)} temp files left")
+
+    failures = []
+    if rss_growth > args.rss_tolerance_mb:
+        failures.append(f"RSS grew {rss_growth:.1f} MB (allowed {args.rss_tolerance_mb} MB)")
+    if file_growth > 0 or disk_growth > 0 or tmp_files:
+        failures.append("disk usage grew")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("PASS: disk and RSS stayed flat")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,133 +1,700 @@
 """
 Database caching module for Leprechaun Name Generator
-Provides in-memory caching for names database with periodic persistence
+Provides write-behind caching for the names database over pluggable storage backends
 """
 
 import os
+import fcntl
 import json
+import sqlite3
 import threading
-import time
+from abc import ABC, abstractmethod
 from datetime import datetime
+from urllib.parse import quote
 
-class NameDatabaseCache:
+from records import ColumnarRecordStore, leprechaun_name_of
+
+class AppendLog:
     """
-    In-memory cache for names database with automatic persistence
+    Append-only JSON-lines log of records with group-commit fsync
     """
 
-    def __init__(self, db_file='names.json', auto_save_interval=300):
+    def __init__(self, log_file):
         """
-        Initialize the cache
+        Open the log
+
+        Args:
+            log_file: Path to the JSON-lines log file
+        """
+        self.log_file = log_file
+        self.handle = open(self.log_file, 'a', encoding='utf-8')
+
+    def append(self, entries):
+        """
+        Append (seq, record) pairs and fsync once for the whole group
+
+        Args:
+            entries: List of (sequence number, record dict) tuples
+        """
+        if not entries:
+            return
+        lines = ''.join(json.dumps({'seq': seq, 'record': record}) + '\n' for seq, record in entries)
+        self.handle.write(lines)
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+
+    @staticmethod
+    def replay(log_file):
+        """Yield (seq, record) pairs from a log file, stopping at a torn final line"""
+        if not os.path.isfile(log_file):
+            return
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    yield entry['seq'], entry['record']
+                except (ValueError, KeyError):
+                    # A crash mid-write leaves at most one partial line at the end
+                    print(f"Ignoring incomplete entry in {log_file}")
+                    return
+
+    def rotate(self, rotated_file):
+        """Move the log's entries to rotated_file and continue in an empty log"""
+        self.handle.close()
+        if os.path.exists(rotated_file):
+            # An earlier snapshot failed, so keep its entries ahead of these
+            with open(self.log_file, 'r', encoding='utf-8') as src, open(rotated_file, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.log_file)
+        else:
+            os.replace(self.log_file, rotated_file)
+        self.handle = open(self.log_file, 'a', encoding='utf-8')
+
+    def close(self):
+        """Close the log file"""
+        self.handle.close()
+
+class StoreLock:
+    """
+    Exclusive lock on <db_file>.lock, held by the one process that owns the database
+
+    A gunicorn reload starts the new worker before the old one has stopped; the new
+    worker waits here until the old one has written its names and released the lock.
+    """
+
+    def __init__(self, db_file):
+        """
+        Args:
+            db_file: Path to the database file being protected
+        """
+        self.lock_file = f"{db_file}.lock"
+        self.handle = None
+
+    def acquire(self, wait=True):
+        """
+        Take the lock
 
         Args:
-            db_file: Path to JSON database file
-            auto_save_interval: Seconds between automatic saves (default: 5 minutes)
+            wait: Wait for the current owner to release it, rather than giving up
+
+        Returns:
+            False if another process holds the lock and wait is False, otherwise True
+        """
+        try:
+            handle = open(self.lock_file, 'a')
+        except OSError as e:
+            # Read-only filesystems cannot be shared by writers anyway
+            print(f"Warning: cannot open {self.lock_file} ({e}), database ownership is not locked")
+            return True
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if not wait:
+                handle.close()
+                return False
+            print(f"Waiting for another process to release {self.lock_file}")
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        self.handle = handle
+        return True
+
+    def release(self):
+        """Release the lock"""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+class NameStorage(ABC):
+    """
+    Interface for persistent name storage backends
+
+    Backends receive (seq, record) pairs in batches from a single writer thread
+    and may be read concurrently from request threads.
+    """
+
+    @abstractmethod
+    def count(self):
+        """Number of stored records"""
+
+    @abstractmethod
+    def get_all(self):
+        """All stored records in insertion order"""
+
+    @abstractmethod
+    def iter_records(self, start=0):
+        """Yield (seq, record) pairs from seq start onwards without copying the whole store"""
+
+    @abstractmethod
+    def append(self, entries):
+        """Durably store a batch of (seq, record) pairs"""
+
+    def compact(self):
+        """Periodic maintenance; returns True on success"""
+        return True
+
+    @abstractmethod
+    def clear(self):
+        """Delete all records"""
+
+    def close(self):
+        """Release files and connections"""
+
+class JSONLogStorage(NameStorage):
+    """
+    Names held in memory, persisted as a JSON snapshot plus an append-only log
+
+    Records live in a ColumnarRecordStore that is only ever appended to or replaced,
+    never modified in place, so (store, length) is a consistent copy-on-write
+    snapshot that can be read without holding the lock.
+    """
+
+    def __init__(self, db_file='names.json', read_only=False):
+        """
+        Load the snapshot and replay the log
+
+        Args:
+            db_file: Path to JSON database file (the snapshot)
+            read_only: Leave the files untouched: no log is opened and a recovered log is not compacted
         """
         self.db_file = db_file
-        self.auto_save_interval = auto_save_interval
-        self.cache = []  # In-memory cache of names
-        self.modified = False
+        self.log_file = f"{db_file}.log"
+        self.rotated_log_file = f"{db_file}.log.1"  # Log segment being folded into a snapshot
+        self.records = ColumnarRecordStore()
         self.lock = threading.Lock()
-        self.save_thread = None
-        self.running = False
-
-        # Load initial data
+        self.compact_lock = threading.Lock()
+        self.modified = False  # Log holds records that are not in the snapshot
         self._load_from_disk()
 
-        # Start auto-save thread
-        self._start_auto_save()
+        self.log = None
+        if read_only:
+            return
+        try:
+            self.log = AppendLog(self.log_file)
+        except OSError as e:
+            # Read-only filesystems (e.g. serverless deployments) still serve the loaded names
+            print(f"Warning: cannot open {self.log_file} ({e}), new names are kept in memory only")
+            return
+
+        # Fold a recovered log into the snapshot so new entries never follow a torn line
+        if os.path.getsize(self.log_file) or os.path.exists(self.rotated_log_file):
+            self.modified = True
+            self.compact()
 
     def _load_from_disk(self):
-        """Load data from JSON file into cache"""
+        """Load the snapshot and replay the log segments"""
         try:
             if os.path.exists(self.db_file):
                 with open(self.db_file, 'r') as f:
-                    self.cache = json.load(f)
-                print(f"Loaded {len(self.cache)} names from {self.db_file}")
+                    self.records = ColumnarRecordStore(json.load(f))
+                print(f"Loaded {len(self.records)} names from {self.db_file}")
             else:
-                self.cache = []
+                self.records = ColumnarRecordStore()
                 print(f"Database file {self.db_file} does not exist, starting with empty cache")
         except Exception as e:
             print(f"Error loading database: {e}")
-            self.cache = []
+            self.records = ColumnarRecordStore()
 
-    def _save_to_disk(self):
-        """Save cache to JSON file"""
+        # Records the snapshot already holds are skipped, so a crash between
+        # writing the snapshot and dropping the log loses nothing and duplicates nothing
+        replayed = 0
+        for log_file in (self.rotated_log_file, self.log_file):
+            for seq, record in AppendLog.replay(log_file):
+                if seq < len(self.records):
+                    continue
+                self.records.append(record)
+                replayed += 1
+        if replayed:
+            print(f"Replayed {replayed} names from {self.log_file}")
+
+    def _snapshot(self):
+        """O(1) handle on the current records"""
+        with self.lock:
+            return self.records, len(self.records)
+
+    def count(self):
+        return self._snapshot()[1]
+
+    def get_all(self):
+        records, count = self._snapshot()
+        return records[:count]
+
+    def iter_records(self, start=0):
+        records, count = self._snapshot()
+        for seq in range(max(start, 0), count):
+            yield seq, records[seq]
+
+    def append(self, entries):
+        if not entries:
+            return
+        with self.lock:
+            if self.log is None:
+                self.records.extend(record for _, record in entries)
+                return
+            self.log.append(entries)
+            self.records.extend(record for _, record in entries)
+            self.modified = True
+
+    def compact(self):
+        """Write a snapshot of all records and drop the log entries it covers"""
+        if self.log is None:
+            return True  # Memory-only, nothing can be persisted
+        with self.compact_lock:
+            with self.lock:
+                if not self.modified:
+                    return True
+                records, count = self.records, len(self.records)
+                # Entries logged from here on go to a fresh segment the snapshot does not cover
+                self.log.rotate(self.rotated_log_file)
+                self.modified = False
+
+            # Serialize and write without blocking appends or reads
+            try:
+                tmp_file = f"{self.db_file}.tmp"
+                with open(tmp_file, 'w') as f:
+                    f.write('[')
+                    for index in range(count):
+                        f.write(',\n' if index else '\n')
+                        f.write(json.dumps(records[index]))
+                    f.write('\n]\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.db_file)
+                os.remove(self.rotated_log_file)
+                print(f"Saved {count} names to {self.db_file}")
+                return True
+            except Exception as e:
+                # The rotated segment stays on disk and is merged into the next attempt
+                print(f"Error saving database: {e}")
+                with self.lock:
+                    self.modified = True
+                return False
+
+    def clear(self):
+        with self.lock:
+            self.records = ColumnarRecordStore()
+            self.modified = True
+        self.compact()
+
+    def close(self):
+        with self.lock:
+            if self.log is not None:
+                self.log.close()
+
+class SQLiteStorage(NameStorage):
+    """
+    Names stored in SQLite (WAL mode) and read on demand rather than held in memory
+    """
+
+    def __init__(self, db_file='names.db'):
+        """
+        Open the database, creating the schema if needed
+
+        Args:
+            db_file: Path to SQLite database file
+        """
+        self.db_file = db_file
+        self.lock = threading.Lock()
         try:
-            with open(self.db_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
-            self.modified = False
-            print(f"Saved {len(self.cache)} names to {self.db_file}")
+            self.conn = sqlite3.connect(db_file, check_same_thread=False)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=FULL')
+            self._create_schema(self.conn)
+        except (sqlite3.Error, OSError) as e:
+            # Read-only filesystems (e.g. serverless deployments) still serve the stored names
+            print(f"Warning: cannot open {db_file} for writing ({e}), new names are kept in memory only")
+            self.conn = self._open_in_memory(db_file)
+        self._count = self.conn.execute('SELECT COUNT(*) FROM names').fetchone()[0]
+        print(f"Opened {db_file} with {self._count} names")
+
+    @staticmethod
+    def _create_schema(conn):
+        """Create the names table and its indexes if they do not exist"""
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS names (
+                seq INTEGER PRIMARY KEY,
+                timestamp TEXT,
+                leprechaun_name TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_names_timestamp ON names (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_names_leprechaun_name ON names (leprechaun_name);
+        ''')
+        conn.commit()
+
+    @classmethod
+    def _open_in_memory(cls, db_file):
+        """In-memory database seeded with whatever db_file holds, if it can be read"""
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        if os.path.isfile(db_file):
+            try:
+                source = sqlite3.connect(f"file:{quote(os.path.abspath(db_file))}?mode=ro", uri=True)
+                try:
+                    source.backup(conn)
+                finally:
+                    source.close()
+            except sqlite3.Error as e:
+                print(f"Error reading {db_file}: {e}")
+        cls._create_schema(conn)
+        return conn
+
+    # Rows fetched per query while iterating
+    ITER_BATCH_SIZE = 500
+
+    @staticmethod
+    def _row(seq, record):
+        return seq, record.get('timestamp'), leprechaun_name_of(record), json.dumps(record)
+
+    def count(self):
+        with self.lock:
+            return self._count
+
+    def get_all(self):
+        with self.lock:
+            rows = self.conn.execute('SELECT data FROM names ORDER BY seq').fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def iter_records(self, start=0):
+        # Keyset pagination keeps no cursor open between batches
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    'SELECT seq, data FROM names WHERE seq >= ? ORDER BY seq LIMIT ?',
+                    (start, self.ITER_BATCH_SIZE)
+                ).fetchall()
+            for seq, data in rows:
+                yield seq, json.loads(data)
+            if len(rows) < self.ITER_BATCH_SIZE:
+                return
+            start = rows[-1][0] + 1
+
+    def append(self, entries):
+        if not entries:
+            return
+        with self.lock:
+            # One transaction per batch is the group commit
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO names (seq, timestamp, leprechaun_name, data) VALUES (?, ?, ?, ?)',
+                    [self._row(seq, record) for seq, record in entries]
+                )
+            self._count = max(self._count, max(seq for seq, _ in entries) + 1)
+
+    def compact(self):
+        """Checkpoint the write-ahead log into the main database file"""
+        try:
+            with self.lock:
+                self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
             return True
-        except Exception as e:
-            print(f"Error saving database: {e}")
+        except sqlite3.Error as e:
+            print(f"Error checkpointing database: {e}")
+            return False
+
+    def clear(self):
+        with self.lock:
+            with self.conn:
+                self.conn.execute('DELETE FROM names')
+            self._count = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# Storage backends selectable via config.DB_BACKEND
+STORAGE_BACKENDS = {
+    'json': JSONLogStorage,
+    'sqlite': SQLiteStorage
+}
+
+def create_storage(backend='json', db_file='names.json'):
+    """Create a storage backend by name"""
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}'. Choose from: {', '.join(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[backend](db_file)
+
+class NameDatabaseCache:
+    """
+    Write-behind cache for the names database over a pluggable storage backend
+
+    store_service.StoreClient implements the same interface. add(name_data, wait_for_id=False)
+    only guarantees a returned seq and name_data['id'] when wait_for_id is True; otherwise
+    a StoreClient returns None and the ID is assigned when the name reaches the service.
+    """
+
+    def __init__(self, db_file='names.json', auto_save_interval=300, log_flush_interval=1,
+                 backend='json', storage=None):
+        """
+        Initialize the cache
+
+        Args:
+            db_file: Path to the backend's database file
+            auto_save_interval: Seconds between storage compactions (default: 5 minutes)
+            log_flush_interval: Seconds between group commits of new names to storage
+            backend: Storage backend name (see STORAGE_BACKENDS)
+            storage: Pre-built NameStorage instance (overrides backend and db_file)
+        """
+        self.db_file = db_file
+        self.backend = backend
+        self.auto_save_interval = auto_save_interval
+        self.log_flush_interval = log_flush_interval
+        self.pending = []  # (seq, record) pairs not yet written to storage
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()  # Serializes batches written to storage
+        self.save_thread = None
+        self.log_thread = None
+        self.running = False
+        self.stop_event = threading.Event()  # Wakes background threads on stop
+        self.observers = []  # Objects with observe(record) and reset(), notified on add and clear
+
+        # Load initial data, owning the database exclusively unless a storage is passed in
+        self.store_lock = None
+        if storage is None:
+            self.store_lock = StoreLock(db_file)
+            self.store_lock.acquire()
+        self.storage = storage or create_storage(backend, db_file)
+        self.next_seq = self.storage.count()
+
+        # Start auto-save thread
+        self._start_auto_save()
+
+    def _flush_log(self):
+        """Write pending records to storage as one group commit"""
+        with self.io_lock:
+            with self.lock:
+                entries, self.pending = self.pending, []
+            try:
+                self.storage.append(entries)
+            except Exception as e:
+                print(f"Error writing database log: {e}")
+                with self.lock:
+                    self.pending = entries + self.pending
+                return False
+            return True
+
+    def _save_to_disk(self):
+        """Flush pending records and compact storage"""
+        if not self._flush_log():
             return False
+        # Backends snapshot without blocking add() or further log flushes
+        if not self.storage.compact():
+            return False
+        for observer in self.observers:
+            # Observers that persist their own state (optional hook)
+            checkpoint = getattr(observer, 'checkpoint', None)
+            if checkpoint:
+                checkpoint()
+        return True
+
+    def _log_writer_worker(self):
+        """Background thread for group-committing new names to storage"""
+        while self.running:
+            self.stop_event.wait(self.log_flush_interval)
+            if self.pending:
+                self._flush_log()
 
     def _auto_save_worker(self):
-        """Background thread for periodic saving"""
+        """Background thread for periodic compaction"""
         while self.running:
-            time.sleep(self.auto_save_interval)
-            with self.lock:
-                if self.modified:
-                    self._save_to_disk()
+            self.stop_event.wait(self.auto_save_interval)
+            if self.running:
+                self._save_to_disk()
 
     def _start_auto_save(self):
-        """Start the auto-save background thread"""
+        """Start the log writer and auto-save background threads"""
         self.running = True
+        self.log_thread = threading.Thread(target=self._log_writer_worker, daemon=True)
+        self.log_thread.start()
         self.save_thread = threading.Thread(target=self._auto_save_worker, daemon=True)
         self.save_thread.start()
-        print(f"Auto-save thread started (interval: {self.auto_save_interval}s)")
+        print(f"Auto-save thread started (interval: {self.auto_save_interval}s, log flush: {self.log_flush_interval}s)")
+
+    def reopen_after_fork(self):
+        """
+        Reload storage and restart background threads in a forked worker
+
+        Threads do not survive fork, and the parent's view of the store may be older
+        than what previous workers have written since, so everything is reloaded from disk.
+        The parent must have stopped the cache before forking, releasing the store lock
+        this worker now waits for.
+        """
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.pending = []
+        if self.store_lock:
+            self.store_lock.release()  # Closes only this process's copy of an inherited handle
+        self.store_lock = StoreLock(self.db_file)
+        self.store_lock.acquire()
+        self.storage = create_storage(self.backend, self.db_file)
+        self.next_seq = self.storage.count()
+
+        for observer in self.observers:
+            observer.reset()
+        for _, record in self.iter_names():
+            for observer in self.observers:
+                observer.observe(record)
+
+        self._start_auto_save()
 
     def stop(self):
-        """Stop the cache and save any pending changes"""
+        """Stop the cache, save any pending changes and release the database"""
+        if not self.running:
+            return
         self.running = False
-        if self.save_thread:
-            self.save_thread.join(timeout=5)
-        if self.modified:
-            self._save_to_disk()
+        self.stop_event.set()
+        if self.log_thread:
+            self.log_thread.join(timeout=5)
+        self._save_to_disk()
+        self.storage.close()
+        if self.store_lock:
+            self.store_lock.release()
         print("Cache stopped")
 
     def get_all(self):
-        """Get all names from cache"""
+        """Get all names from storage, including ones not yet written"""
         with self.lock:
-            return self.cache.copy()
+            pending = list(self.pending)
+        records = self.storage.get_all()
+        # Pending entries flushed since they were read are already in records
+        return records + [record for seq, record in pending if seq >= len(records)]
 
-    def add(self, name_data):
-        """Add a new name to cache"""
+    def add_observer(self, observer, replay=False):
+        """
+        Register an aggregate to be updated on every add
+
+        Args:
+            observer: Object with observe(record) and reset() methods, and optionally
+                checkpoint(), called after each compaction
+            replay: Feed the observer every existing name first
+        """
+        if replay:
+            for _, record in self.iter_names():
+                observer.observe(record)
+        self.observers.append(observer)
+
+    def iter_names(self, start=0):
+        """
+        Iterate over names without copying the whole database
+
+        Args:
+            start: First sequence number to return
+
+        Yields:
+            (seq, record) pairs in insertion order
+        """
+        with self.lock:
+            pending = list(self.pending)
+        next_seq = start
+        for seq, record in self.storage.iter_records(start):
+            yield seq, record
+            next_seq = seq + 1
+        # Pending entries flushed during iteration were already returned from storage
+        for seq, record in pending:
+            if seq >= next_seq:
+                yield seq, record
+
+    def add(self, name_data, wait_for_id=False):
+        """
+        Add a new name to cache
+
+        Args:
+            name_data: Record to store; its 'id' is set to its 1-based position,
+                continuing the numbering of legacy names.json records
+            wait_for_id: Accepted for StoreClient compatibility (the ID is always assigned here)
+
+        Returns:
+            Index (seq) of the added item
+        """
         with self.lock:
             # Add timestamp if not present
             if 'timestamp' not in name_data:
                 name_data['timestamp'] = datetime.now().isoformat()
 
-            self.cache.append(name_data)
-            self.modified = True
-            return len(self.cache) - 1  # Return index of added item
+            index = self.next_seq
+            self.next_seq += 1
+            name_data['id'] = index + 1
+            self.pending.append((index, name_data))
+
+        for observer in self.observers:
+            try:
+                observer.observe(name_data)
+            except Exception as e:
+                print(f"Error in cache observer: {e}")
+        return index  # Return index of added item
+
+    def add_many(self, names):
+        """
+        Add several names in one step, setting each one's 'id' as add() does
+
+        Returns:
+            Index of the first added item
+        """
+        timestamp = datetime.now().isoformat()
+        with self.lock:
+            first = self.next_seq
+            for record_id, name_data in enumerate(names, first + 1):
+                if 'timestamp' not in name_data:
+                    name_data['timestamp'] = timestamp
+                name_data['id'] = record_id
+            self.pending.extend(enumerate(names, first))
+            self.next_seq += len(names)
+
+        for observer in self.observers:
+            try:
+                for name_data in names:
+                    observer.observe(name_data)
+            except Exception as e:
+                print(f"Error in cache observer: {e}")
+        return first
 
     def get_count(self):
         """Get count of names in cache"""
         with self.lock:
-            return len(self.cache)
+            return self.next_seq
 
     def save_now(self):
         """Force immediate save to disk"""
-        with self.lock:
-            return self._save_to_disk()
+        return self._save_to_disk()
 
     def clear(self):
         """Clear the cache (use with caution)"""
-        with self.lock:
-            self.cache = []
-            self.modified = True
-            self._save_to_disk()
-            return True
+        with self.io_lock:
+            with self.lock:
+                self.pending = []
+                self.next_seq = 0
+            self.storage.clear()
+        for observer in self.observers:
+            observer.reset()
+        return True
 
 # Global cache instance
 _name_cache = None
 
-def init_cache(db_file='names.json', auto_save_interval=300):
+def init_cache(db_file='names.json', auto_save_interval=300, log_flush_interval=1, backend='json'):
     """Initialize the global cache"""
     global _name_cache
     if _name_cache is None:
-        _name_cache = NameDatabaseCache(db_file, auto_save_interval)
+        _name_cache = NameDatabaseCache(db_file, auto_save_interval, log_flush_interval, backend)
     return _name_cache
 
 def get_cache():
@@ -10,15 +10,31 @@ import re
 APP_NAME = "Leprechaun Name Generator"
 APP_VERSION = "1.0.0"
 DEBUG = False  # Set to True for development
+SECRET_KEY = os.environ.get('SECRET_KEY')  # Signs sessions and permalinks; keep it stable across deploys or old permalinks stop working
 
 # Database settings
+DB_BACKEND = 'json'  # 'json' (snapshot + append log, held in memory) or 'sqlite'
 DB_FILE = 'names.json'
-DB_AUTO_SAVE_INTERVAL = 300  # Auto-save cache every 5 minutes (seconds)
+DB_SQLITE_FILE = 'names.db'
+DB_AUTO_SAVE_INTERVAL = 300  # Compact the log into names.json every 5 minutes (seconds)
+DB_LOG_FLUSH_INTERVAL = 1  # Group-commit new names to the append log every second
+
+# Store service (one process owns the database; required to run more than one web worker)
+DB_STORE_SERVICE = os.environ.get('DB_STORE_SERVICE', '0') == '1'  # Send names to store_service.py instead of writing in-process
+DB_STORE_SOCKET = 'names-store.sock'  # Unix socket of the store service
+DB_STORE_AUTOSTART = True  # Start the service from the app when it is not already running
+DB_STORE_FLUSH_INTERVAL = 0.05  # Seconds between batched sends from each worker
+DB_STORE_MAX_BUFFER = 10000  # Names a worker holds while the service is unreachable
 
 # Rate limiting settings
 RATE_LIMIT_DEFAULT = ["100 per hour", "20 per minute"]
 RATE_LIMIT_NAME_GENERATION = "10 per minute"
-RATE_LIMIT_PDF_GENERATION = "5 per minute"
+RATE_LIMIT_PDF_GENERATION = "5 per minute"  # Shared by every route that renders a PDF; PDF cache hits are exempt
+RATE_LIMIT_PDF_BATCH = "2 per minute"
+RATE_LIMIT_NAME_BATCH = "2 per minute"
+RATE_LIMIT_PREVIEW = "30 per minute"  # All previews; ones that render also count against RATE_LIMIT_PDF_GENERATION
+RATE_LIMIT_STORAGE_URI = "sqlite:///ratelimits.db"  # Shared by all worker processes; falls back to "memory://" (per process) if unwritable
+RATE_LIMIT_STRATEGY = "sliding-window-counter"  # Smooths bursts at window edges; also "moving-window" or "fixed-window"
 
 # Security settings
 SECURITY_HEADERS = {
@@ -29,6 +45,11 @@ SECURITY_HEADERS = {
     'Referrer-Policy': 'strict-origin-when-cross-origin'
 }
 
+# Admin API settings (the /names history endpoint is disabled unless a token is set)
+ADMIN_API_TOKEN = os.environ.get('ADMIN_API_TOKEN')
+NAMES_PAGE_SIZE = 50  # Default names per page
+NAMES_MAX_PAGE_SIZE = 500
+
 # Input validation
 NAME_REGEX = re.compile(r'^[a-zA-Z\s\-\']{1,50}$')
 
@@ -41,6 +62,40 @@ PDF_TEMPLATE_FILES = {
     'rainbow-magic': 'rainbow-magic-template.html'
 }
 
+PDF_ALLOW_NETWORK_ASSETS = False  # Fonts missing from the asset bundle load from Google Fonts when True; never fetched when False
+
+# PDF render pool settings
+PDF_RENDER_POOL_ENABLED = True  # Render in warm worker processes instead of the request thread
+PDF_RENDER_WORKERS = 2  # Number of render worker processes
+PDF_RENDER_QUEUE_DEPTH = 8  # Jobs allowed to wait for a free worker before rejecting
+PDF_RENDER_TIMEOUT = 30  # Seconds a render job may take before its worker is killed
+PDF_RENDER_MAX_JOBS_PER_WORKER = 200  # Recycle workers to bound renderer memory growth
+
+# Watermark settings (free-tier certificates are watermarked; see monetization_plan.md)
+PDF_WATERMARK_FREE = os.environ.get('PDF_WATERMARK_FREE', '0') == '1'  # Watermark certificates for clients without a premium token
+PDF_WATERMARK_TEXT = "FREE VERSION"
+PDF_PREMIUM_TOKENS = [token for token in os.environ.get('PDF_PREMIUM_TOKENS', '').split(',') if token]  # Bearer tokens that get unwatermarked certificates
+
+# Certificate preview settings (/preview rasterizes the cached PDF; requires pypdfium2)
+PREVIEW_ENABLED = True
+PREVIEW_WIDTHS = [240, 480, 960]  # Allowed image widths in pixels, which bounds the variants per certificate
+PREVIEW_DEFAULT_WIDTH = 480
+PREVIEW_FORMATS = ['webp', 'png']  # Preferred first when the client accepts several
+PREVIEW_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Memory for encoded preview images
+PREVIEW_CACHE_MAX_AGE = 3600  # Seconds browsers and proxies may reuse a preview (previews show today's date)
+
+# Batch certificate settings
+PDF_BATCH_MAX_NAMES = 200  # Maximum names per batch request
+PDF_BATCH_CONCURRENCY = 2  # Certificates rendered at once per batch request
+PDF_BATCH_FORMATS = ['zip', 'pdf']
+
+# Asynchronous PDF job settings
+PDF_JOB_WORKERS = 2  # Threads feeding queued jobs to the renderer
+PDF_JOB_MAX_PENDING = 100  # Jobs allowed to wait before new submissions are rejected
+PDF_JOB_RESULT_TTL = 600  # Seconds a finished job's PDF is kept for retrieval
+PDF_JOB_SWEEP_INTERVAL = 60  # Seconds between sweeps that drop jobs older than PDF_JOB_RESULT_TTL
+PDF_JOB_DB = 'pdf-jobs.db'  # SQLite file sharing job status and PDFs between workers (None keeps them per process)
+
 # Name generation settings
 FIRST_NAMES = [
     'Finnegan', 'Seamus', 'Patrick', 'Liam', 'Connor', 'Aiden', 'Rory', 'Declan',
@@ -57,6 +112,128 @@ LAST_NAMES = [
     "Brown", "Wilson", "Taylor", "Davis"
 ]
 
+# Decorations for personalised names
+IRISH_PREFIXES = ['Mc', "O'", 'Fitz']
+IRISH_SUFFIXES = ['-een', '-y', ' the Lucky', ' of the Emerald Isle']
+IRISH_PREFIX_CHANCE = 0.3  # 30% chance to add an Irish prefix
+IRISH_SUFFIX_CHANCE = 0.2  # 20% chance to add an Irish suffix
+
+# Tables used by the legacy app.py generator
+LEGACY_IRISH_FIRST = [
+    'Aidan', 'Brendan', 'Cillian', 'Darragh', 'Eoin', 'Finn', 'Gearoid', 'Liam',
+    'Niall', 'Oisin', 'Padraig', 'Ronan', 'Sean', 'Tadhg', 'Cormac'
+]
+LEGACY_IRISH_PREFIXES = ['Mc', "O'", 'Mac', 'Fitz']
+LEGACY_IRISH_ROOTS = [
+    'Gleeson', 'Murphy', 'Kelly', "O'Brien", 'Ryan', 'Sullivan', 'Walsh', 'McCarthy',
+    "O'Connor", 'Doyle', 'Kennedy', 'Lynch', 'Moore', 'Reilly', 'Brennan'
+]
+LEGACY_MEANINGS = [
+    "Keeper of the rainbow's end",
+    "Guardian of hidden treasures",
+    "Weaver of golden dreams",
+    "Master of four-leaf clovers",
+    "Protector of ancient magic",
+    "Craftsman of enchanted shoes",
+    "Watcher of the emerald hills",
+    "Keeper of the pot of gold"
+]
+
+def _decoration_weights(decorations, chance):
+    """Weighted table choosing no decoration with probability 1 - chance"""
+    return {'': 1 - chance, **{item: chance / len(decorations) for item in decorations}}
+
+# Name generation styles per locale: weighted patterns whose {slots} are drawn from
+# weighted tables ({first_name} and {last_name} come from the request). Tables and
+# patterns are lists (equal weights) or dicts of value -> weight, compiled at startup.
+# Clients pick a locale with the "locale" field of /generate and /generate/batch; locale
+# codes must be two letters because permalinks encode them.
+NAME_DEFAULT_LOCALE = 'en'
+NAME_STYLES = {
+    'en': {
+        # app_secure: random names and personalised names with Irish flair
+        'random': {
+            'patterns': ['{first} {last}'],
+            'tables': {'first': FIRST_NAMES, 'last': LAST_NAMES}
+        },
+        'irish': {
+            'patterns': ['{first_name} {prefix}{last_name}{suffix}'],
+            'tables': {
+                'prefix': _decoration_weights(IRISH_PREFIXES, IRISH_PREFIX_CHANCE),
+                'suffix': _decoration_weights(IRISH_SUFFIXES, IRISH_SUFFIX_CHANCE)
+            }
+        },
+        # app.py methods
+        'traditional': {
+            'patterns': ['{first} {prefix}{root}'],
+            'tables': {'first': LEGACY_IRISH_FIRST, 'prefix': LEGACY_IRISH_PREFIXES, 'root': LEGACY_IRISH_ROOTS}
+        },
+        'modern': {
+            'patterns': ['{first} {last}'],
+            'tables': {
+                'first': ['Finn', 'Riley', 'Quinn', 'Casey', 'Dylan'],
+                'last': ['Green', 'Gold', 'Rainbow', 'Clover', 'Shamrock']
+            }
+        },
+        'classic': {
+            'patterns': ['{first} {root}'],
+            'tables': {'first': LEGACY_IRISH_FIRST, 'root': LEGACY_IRISH_ROOTS}
+        },
+        'meaning': {
+            'patterns': ['{meaning}'],
+            'tables': {'meaning': LEGACY_MEANINGS}
+        }
+    },
+    'ga': {
+        # Gaelic-style forms; styles not listed here fall back to the default locale
+        'random': {
+            'patterns': ['{first} {prefix}{last}'],
+            'tables': {
+                'first': ['Sean', 'Padraig', 'Ciaran', 'Eamon', 'Ruairi', 'Cathal', 'Donal', 'Fiachra', 'Tadhg', 'Oisin'],
+                'prefix': {'Mac ': 2, 'O ': 2, '': 1},
+                'last': ['Briain', 'Carthaigh', 'Suilleabhain', 'Conchuir', 'Donaill', 'Murchu', 'Ceallaigh', 'Gallchobhair']
+            }
+        },
+        'irish': {
+            'patterns': ['{first_name} {prefix}{last_name}'],
+            'tables': {'prefix': {'': 0.6, 'Mac ': 0.2, 'O ': 0.2}}
+        }
+    }
+}
+
+# Permalink settings (/n/<seed> responses never change, so they may be cached anywhere)
+PERMALINK_CACHE_MAX_AGE = 31536000  # Cache-Control max-age for permalink responses (seconds)
+
+# Unique names (re-draw names already issued, checked against a Bloom filter of saved names)
+UNIQUE_NAMES = False  # Enable the filter and re-drawing
+UNIQUE_NAMES_MAX_ATTEMPTS = 20  # Draws per name before accepting a duplicate
+NAME_FILTER_CAPACITY = 1000000  # Names the false-positive rate is sized for
+NAME_FILTER_ERROR_RATE = 0.001  # Chance an unused name is wrongly reported as issued
+NAME_FILTER_MAX_BYTES = 4 * 1024 * 1024  # Memory budget for the filter's bit array
+
+# Bulk generation settings
+GENERATE_BATCH_MAX_NAMES = 5000  # Names allowed in one /generate/batch request
+
+# Statistics settings
+STATS_HOURLY_BUCKETS = 48  # Hours of generation history kept for /stats
+STATS_TOP_NAMES = 10  # Popular names reported by /stats
+STATS_HEAVY_HITTER_CAPACITY = 100  # Names tracked by the popular-names sketch
+
+# Metrics settings (/metrics in Prometheus text format, summed over all gunicorn workers)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'  # Time request and render stages; when off each stage costs one no-op call
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Histogram bounds in seconds
+METRICS_DIR = 'metrics-data'  # Per-worker snapshots summed by /metrics (None, or unwritable, makes each scrape report one worker)
+METRICS_FLUSH_INTERVAL = 1  # Seconds between snapshots of each worker's numbers
+
+# Production server settings (gunicorn.conf.py)
+SERVER_BIND = os.environ.get('BIND', '0.0.0.0:5000')
+SERVER_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))  # Worker processes; more than 1 requires DB_STORE_SERVICE
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 8))  # Request threads per worker; PDF renders run in the render pool, not these threads
+SERVER_TIMEOUT = 60  # Seconds before a stuck worker is restarted (must exceed PDF_RENDER_TIMEOUT)
+SERVER_GRACEFUL_TIMEOUT = 30  # Seconds a stopping worker gets to finish requests and flush names
+SERVER_KEEPALIVE = 5  # Seconds to hold idle keep-alive connections
+SERVER_MAX_REQUESTS = 0  # Recycle a worker after this many requests (0 disables)
+
 # Logging settings
 LOG_FILE = 'flask_secure.log'
 LOG_LEVEL = 'INFO'  # DEBUG, INFO, WARNING, ERROR, CRITICAL
@@ -65,3 +242,6 @@ LOG_LEVEL = 'INFO'  # DEBUG, INFO, WARNING, ERROR, CRITICAL
 CACHE_ENABLED = True
 CACHE_MAX_SIZE = 1000  # Maximum cached responses
 CACHE_TTL = 300  # Cache time-to-live in seconds
+PDF_CACHE_DIR = None  # Directory for the on-disk PDF cache tier (None disables it)
+PDF_CACHE_DISK_MAX_FILES = 10000  # Maximum PDFs kept in the disk tier
+PDF_CACHE_DISK_TTL = 86400  # Disk tier time-to-live in seconds
@@ -9,12 +9,12 @@ pip install -r requirements.txt
 # Set environment variables
 export FLASK_APP=app_secure.py
 export FLASK_ENV=production
-export SECRET_KEY=$(openssl rand -hex 32)
+export SECRET_KEY=${SECRET_KEY:-$(openssl rand -hex 32)}  # Keep a configured key: it signs permalinks
 
 # Run with gunicorn for production
 if command -v gunicorn &> /dev/null; then
     echo "Starting with gunicorn..."
-    gunicorn --bind 0.0.0.0:5000 --workers 4 app_secure:app
+    gunicorn -c gunicorn.conf.py app_secure:app
 else
     echo "Starting with Flask development server..."
     python app_secure.py
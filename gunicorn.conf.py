@@ -0,0 +1,71 @@
+"""
+Gunicorn configuration for Leprechaun Name Generator
+Usage: gunicorn -c gunicorn.conf.py app_secure:app
+"""
+
+import config as app_config  # "config" itself is a gunicorn setting name
+
+bind = app_config.SERVER_BIND
+worker_class = 'gthread'
+threads = app_config.SERVER_THREADS
+timeout = app_config.SERVER_TIMEOUT
+graceful_timeout = app_config.SERVER_GRACEFUL_TIMEOUT
+keepalive = app_config.SERVER_KEEPALIVE
+max_requests = app_config.SERVER_MAX_REQUESTS
+max_requests_jitter = app_config.SERVER_MAX_REQUESTS // 10
+
+# Without the store service each worker would write names.json itself and
+# overwrite the others' names, so only one worker is allowed
+workers = app_config.SERVER_WORKERS
+if workers > 1 and not app_config.DB_STORE_SERVICE:
+    print(f"SERVER_WORKERS={workers} ignored: set DB_STORE_SERVICE=1 to share the name store, "
+          f"running 1 worker with {threads} threads instead")
+    workers = 1
+
+# Import the app once in the master: templates are read and parsed, fonts configured
+# and name tables compiled before fork, so workers start warm and share those pages
+preload_app = True
+
+
+def on_starting(server):
+    """Drop per-worker metrics snapshots left by a previous run"""
+    if app_config.METRICS_ENABLED and app_config.METRICS_DIR:
+        import metrics
+        metrics.reset_shared_dir(app_config.METRICS_DIR)
+
+
+def when_ready(server):
+    """Hand the name store loaded by the preloaded app over to the workers"""
+    import app_secure
+    app_secure.before_fork()
+
+
+def post_fork(server, worker):
+    """Reload the name store and restart its writer threads in the new worker"""
+    import app_secure
+    app_secure.after_fork()
+
+
+def worker_int(worker):
+    """Flush names when a worker is interrupted (SIGINT/SIGQUIT)"""
+    import app_secure
+    app_secure.shutdown()
+
+
+def worker_exit(server, worker):
+    """Flush names when a worker stops (SIGTERM, max_requests, reload)"""
+    import app_secure
+    app_secure.shutdown()
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's metrics into the retired total"""
+    if app_config.METRICS_ENABLED and app_config.METRICS_DIR:
+        import metrics
+        metrics.retire_process(app_config.METRICS_DIR, worker.pid)
+
+
+def on_exit(server):
+    """Stop the store service started by the preloaded app once all workers are gone"""
+    import app_secure
+    app_secure.shutdown(stop_store_service=True)
@@ -0,0 +1,362 @@
+"""
+Request metrics for Leprechaun Name Generator
+Per-stage timing histograms and event counters, exported in Prometheus text format
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Counters exported even before they are first incremented: name -> help text
+COUNTERS = {
+    'names_generated': 'Names generated',
+    'name_save_errors': 'Names that could not be saved',
+    'invalid_input': 'Requests rejected by input validation',
+    'pdf_cache_hits': 'Certificates served from the PDF cache',
+    'pdf_cache_misses': 'Certificates that had to be rendered',
+    'pdf_renders': 'Certificates rendered',
+    'pdf_render_errors': 'Certificate renders that failed',
+    'pdf_render_busy': 'Render attempts rejected because the render queue was full',
+}
+
+
+class _NullStage:
+    """Context manager that does nothing, shared by every untimed stage"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+def null_timer(stage):
+    """Timer used when metrics are disabled"""
+    return NULL_STAGE
+
+
+class _Stage:
+    """Context manager appending (stage, seconds) to a list on exit"""
+
+    __slots__ = ('durations', 'stage', 'began')
+
+    def __init__(self, durations, stage):
+        self.durations = durations
+        self.stage = stage
+
+    def __enter__(self):
+        self.began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.durations.append((self.stage, time.perf_counter() - self.began))
+        return False
+
+
+class StageTimer:
+    """
+    Collects stage durations for one job
+
+    Call it with a stage name to get a context manager timing that stage. The
+    collected (stage, seconds) pairs are plain tuples, so a render worker can send
+    them back to the web process along with the PDF.
+    """
+
+    def __init__(self):
+        self.durations = []
+
+    def __call__(self, stage):
+        return _Stage(self.durations, stage)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot counts values above every bound
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Stage timing histograms and counters
+
+    Each process records its own numbers. With a shared directory every process
+    also writes a snapshot of them there (like prometheus_client's multiprocess
+    mode), and render() sums the snapshots, so whichever gunicorn worker answers
+    /metrics reports the whole server. Without one it reports only itself.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='leprechaun', shared_dir=None, flush_interval=1):
+        """
+        Initialize empty metrics
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+            prefix: Prefix of every exported metric name
+            shared_dir: Directory for per-process snapshots shared by all workers (None keeps metrics per process)
+            flush_interval: Seconds between snapshots of this process's numbers
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self.histograms = {}  # stage -> Histogram
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.lock = threading.Lock()
+        self.flush_thread = None
+        self.dirty = False  # Numbers changed since the last snapshot
+
+        self.shared_dir = None
+        if shared_dir:
+            try:
+                os.makedirs(shared_dir, exist_ok=True)
+                if not os.access(shared_dir, os.W_OK):
+                    raise PermissionError(f"{shared_dir} is not writable")
+                self.shared_dir = shared_dir
+            except OSError as e:
+                print(f"Warning: metrics directory unusable ({e}); each worker reports only its own metrics")
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """Start a forked worker with empty numbers; the parent's stay in the parent's snapshot"""
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.flush_thread = None
+        self.dirty = False
+
+    def _changed(self):
+        """Note a change and make sure this process snapshots it (call with lock held)"""
+        self.dirty = True
+        if self.shared_dir and self.flush_thread is None:
+            self.flush_thread = threading.Thread(target=self._flush_worker, daemon=True)
+            self.flush_thread.start()
+
+    def _flush_worker(self):
+        """Background thread: snapshot this process's numbers every flush interval"""
+        while True:
+            time.sleep(self.flush_interval)
+            # A missing snapshot was cleared at server start and is written again
+            if self.dirty or not os.path.exists(self._snapshot_path()):
+                self.flush()
+
+    def _snapshot_path(self, pid=None):
+        return os.path.join(self.shared_dir, f"{pid or os.getpid()}.json")
+
+    def _snapshot(self):
+        """This process's numbers as a JSON-serializable dict"""
+        with self.lock:
+            self.dirty = False
+            return {
+                'buckets': list(self.buckets),
+                'counters': dict(self.counters),
+                'histograms': {stage: [list(h.counts), h.sum, h.count] for stage, h in self.histograms.items()}
+            }
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory"""
+        if not self.shared_dir:
+            return
+        path = self._snapshot_path()
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing metrics snapshot: {e}")
+
+    def observe(self, stage, seconds):
+        """Record one duration for a stage"""
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            self._changed()
+
+    def record(self, durations):
+        """Record (stage, seconds) pairs collected by a StageTimer"""
+        for stage, seconds in durations:
+            self.observe(stage, seconds)
+
+    def timer(self, stage):
+        """Context manager recording the time spent in a stage"""
+        return _RecordingStage(self, stage)
+
+    def inc(self, name, amount=1):
+        """Increment a counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            self._changed()
+
+    def _merged(self):
+        """Snapshot summed over every process sharing the directory, or this process's alone"""
+        if not self.shared_dir:
+            return self._snapshot()
+        self.flush()
+        return merge_snapshots(read_snapshots(self.shared_dir), self.buckets)
+
+    def render(self):
+        """Export all metrics in the Prometheus text format (version 0.0.4)"""
+        merged = self._merged()
+        histograms = [(stage, counts, total, count) for stage, (counts, total, count) in sorted(merged['histograms'].items())]
+        counters = sorted(merged['counters'].items())
+
+        name = f"{self.prefix}_stage_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each stage of request handling",
+            f"# TYPE {name} histogram",
+        ]
+        bounds = [_format_bound(bound) for bound in self.buckets] + ['+Inf']
+        for stage, counts, total, count in histograms:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        for counter, value in counters:
+            name = f"{self.prefix}_{counter}_total"
+            lines.append(f"# HELP {name} {COUNTERS.get(counter, counter.replace('_', ' ').capitalize())}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+class _RecordingStage:
+    """Context manager recording a stage's duration straight into Metrics"""
+
+    __slots__ = ('metrics', 'stage', 'began')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.began)
+        return False
+
+
+def _format_bound(bound):
+    """Bucket bound as Prometheus expects it (1.0, not 1)"""
+    return repr(float(bound))
+
+
+RETIRED_SNAPSHOT = 'retired.json'  # Summed snapshots of workers that have exited
+
+
+def merge_snapshots(snapshots, buckets):
+    """Sum process snapshots recorded with the given bucket bounds (others cannot be summed)"""
+    merged = {'buckets': list(buckets), 'counters': dict.fromkeys(COUNTERS, 0), 'histograms': {}}
+    for snapshot in snapshots:
+        if tuple(snapshot['buckets']) != tuple(buckets):
+            continue
+        for counter, value in snapshot['counters'].items():
+            merged['counters'][counter] = merged['counters'].get(counter, 0) + value
+        for stage, (counts, total, count) in snapshot['histograms'].items():
+            previous = merged['histograms'].get(stage, [[0] * len(counts), 0.0, 0])
+            merged['histograms'][stage] = [
+                [a + b for a, b in zip(previous[0], counts)], previous[1] + total, previous[2] + count
+            ]
+    return merged
+
+
+def read_snapshots(shared_dir):
+    """Load every process snapshot in a shared metrics directory"""
+    snapshots = []
+    try:
+        filenames = [f for f in os.listdir(shared_dir) if f.endswith('.json')]
+    except OSError as e:
+        print(f"Error reading metrics directory: {e}")
+        return snapshots
+    for filename in filenames:
+        try:
+            with open(os.path.join(shared_dir, filename), 'r') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # Removed by retire_process since listing it
+    return snapshots
+
+
+def retire_process(shared_dir, pid):
+    """
+    Fold an exited worker's snapshot into the retired total so counters stay
+    monotonic while the directory does not grow with every worker restart
+
+    Call from one process only (gunicorn's master, in child_exit).
+    """
+    path = os.path.join(shared_dir, f"{pid}.json")
+    retired_path = os.path.join(shared_dir, RETIRED_SNAPSHOT)
+    try:
+        with open(path, 'r') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    try:
+        with open(retired_path, 'r') as f:
+            retired = json.load(f)
+    except (OSError, ValueError):
+        retired = None
+
+    retired = merge_snapshots([snapshot] + ([retired] if retired else []), snapshot['buckets'])
+
+    try:
+        tmp_path = f"{retired_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(retired, f)
+        os.replace(tmp_path, retired_path)
+        os.remove(path)
+    except OSError as e:
+        print(f"Error retiring metrics of worker {pid}: {e}")
+
+
+def reset_shared_dir(shared_dir):
+    """Delete the snapshots of a previous server run"""
+    try:
+        for filename in os.listdir(shared_dir):
+            if filename.endswith('.json'):
+                os.remove(os.path.join(shared_dir, filename))
+    except OSError:
+        pass
+
+# Global metrics instance
+_metrics = None
+
+def init_metrics(buckets=DEFAULT_BUCKETS, shared_dir=None, flush_interval=1):
+    """Initialize the global metrics"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics(buckets, shared_dir=shared_dir, flush_interval=flush_interval)
+    return _metrics
+
+def get_metrics():
+    """Get the global metrics instance"""
+    global _metrics
+    if _metrics is None:
+        raise RuntimeError("Metrics not initialized. Call init_metrics() first.")
+    return _metrics
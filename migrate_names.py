@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Import the JSON names database (names.json plus its append log) into SQLite
+Usage: python migrate_names.py [--source names.json] [--target names.db] [--batch-size 1000] [--force]
+"""
+
+import argparse
+import sys
+
+import cache
+import config
+
+def main():
+    parser = argparse.ArgumentParser(description="Import names.json into the SQLite storage backend")
+    parser.add_argument('--source', default=config.DB_FILE, help="JSON database file")
+    parser.add_argument('--target', default=config.DB_SQLITE_FILE, help="SQLite database file")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Records per insert transaction")
+    parser.add_argument('--force', action='store_true', help="Replace names already in the target")
+    args = parser.parse_args()
+
+    # Refuse to run while the app (or another migration) owns either database
+    locks = []
+    for db_file in (args.source, args.target):
+        lock = cache.StoreLock(db_file)
+        if not lock.acquire(wait=False):
+            print(f"Error: {db_file} is in use ({lock.lock_file} is held); stop the app before migrating")
+            for held in locks:
+                held.release()
+            return 1
+        locks.append(lock)
+
+    # Read-only: recovering the log would rewrite names.json
+    source = cache.JSONLogStorage(args.source, read_only=True)
+    target = cache.SQLiteStorage(args.target)
+    try:
+        if target.count() and not args.force:
+            print(f"{args.target} already holds {target.count()} names; use --force to replace them")
+            return 1
+        if args.force:
+            target.clear()
+
+        records = source.get_all()
+        for start in range(0, len(records), args.batch_size):
+            batch = records[start:start + args.batch_size]
+            target.append(list(enumerate(batch, start)))
+            print(f"Imported {start + len(batch)}/{len(records)} names")
+
+        target.compact()
+        print(f"Migration complete: {target.count()} names in {args.target}")
+        print("Set DB_BACKEND = 'sqlite' in config.py to use it")
+        return 0
+    finally:
+        source.close()
+        target.close()
+        for lock in locks:
+            lock.release()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Issued-name filter for Leprechaun Name Generator
+A Bloom filter over every saved leprechaun name, used to avoid handing out duplicates
+"""
+
+import hashlib
+import math
+import os
+import struct
+import threading
+
+from records import leprechaun_name_of
+
+FILE_MAGIC = b'LNBF'
+FILE_HEADER = struct.Struct('>4sQIQ')  # magic, bits, hashes, names observed
+
+
+def expected_error_rate(bits, hashes, names):
+    """False-positive rate of a Bloom filter holding the given number of names"""
+    return (1 - math.exp(-hashes * names / bits)) ** hashes
+
+
+class NameFilter:
+    """
+    Bloom filter of issued names
+
+    Membership tests never miss a name that was added; they report a name that
+    was never added with roughly the configured false-positive rate.
+    Registered as a NameDatabaseCache observer it sees every saved name and is
+    written next to the store after each compaction.
+    """
+
+    def __init__(self, capacity, error_rate, max_bytes, path=None):
+        """
+        Size the filter
+
+        Args:
+            capacity: Number of names the error rate is sized for
+            error_rate: Target false-positive rate at capacity
+            max_bytes: Memory budget for the bit array; caps the size if smaller
+            path: File the filter is persisted to, or None to keep it in memory only
+        """
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        capped = bits > max_bytes * 8
+        if capped:
+            bits = max_bytes * 8
+        self.bits = max(bits, 8)
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.capacity = capacity
+        self.path = path
+        self.lock = threading.Lock()
+        self.reset()
+        if capped:
+            print(f"Name filter capped at {max_bytes} bytes; expected false-positive rate "
+                  f"at capacity rises to {expected_error_rate(self.bits, self.hashes, capacity):.4%}")
+
+    def _positions(self, name):
+        """Bit positions for a name (double hashing over one digest)"""
+        digest = hashlib.blake2b(name.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def reset(self):
+        """Forget all names"""
+        with self.lock:
+            self.array = bytearray((self.bits + 7) // 8)
+            self.count = 0  # Names observed from the store
+
+    def claim(self, name):
+        """
+        Reserve a name if it looks unused
+
+        Returns:
+            True if the name was (probably) never issued and is now reserved
+        """
+        positions = self._positions(name)
+        with self.lock:
+            if all(self.array[p >> 3] & (1 << (p & 7)) for p in positions):
+                return False
+            for p in positions:
+                self.array[p >> 3] |= 1 << (p & 7)
+            return True
+
+    def __contains__(self, name):
+        positions = self._positions(name)
+        with self.lock:
+            return all(self.array[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def observe(self, record):
+        """Add a saved name (NameDatabaseCache observer hook)"""
+        name = leprechaun_name_of(record)
+        positions = self._positions(name) if name else ()
+        with self.lock:
+            for p in positions:
+                self.array[p >> 3] |= 1 << (p & 7)
+            self.count += 1
+
+    def checkpoint(self):
+        """Persist the filter after the store is compacted (NameDatabaseCache observer hook)"""
+        if not self.path:
+            return
+        with self.lock:
+            header = FILE_HEADER.pack(FILE_MAGIC, self.bits, self.hashes, self.count)
+            data = bytes(self.array)
+        temp_file = f"{self.path}.{os.getpid()}.tmp"  # Store service workers may checkpoint at the same time
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(header)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.path)
+        except OSError as e:
+            print(f"Error saving name filter: {e}")
+
+    def load(self, expected_count):
+        """
+        Load the persisted filter if it matches this configuration and the store
+
+        Args:
+            expected_count: Number of names currently in the store
+
+        Returns:
+            True if loaded, False if it must be rebuilt
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                magic, bits, hashes, count = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+                data = f.read()
+        except (OSError, struct.error) as e:
+            print(f"Error loading name filter: {e}")
+            return False
+        if magic != FILE_MAGIC or bits != self.bits or hashes != self.hashes or len(data) != len(self.array):
+            print("Name filter settings changed, rebuilding")
+            return False
+        if count != expected_count:
+            print(f"Name filter holds {count} names but the store has {expected_count}, rebuilding")
+            return False
+        with self.lock:
+            self.array = bytearray(data)
+            self.count = count
+        return True
+
+    def stats(self):
+        """Filter size and expected false-positive rate"""
+        with self.lock:
+            count = self.count
+        return {
+            'entries': count,
+            'capacity': self.capacity,
+            'bytes': len(self.array),
+            'hashes': self.hashes,
+            'expectedFalsePositiveRate': round(expected_error_rate(self.bits, self.hashes, count), 6)
+        }
@@ -0,0 +1,145 @@
+"""
+Leprechaun name generation for Leprechaun Name Generator
+Single and seeded names for /generate and /n/<seed>, batches for /generate/batch
+"""
+
+import base64
+import hashlib
+import hmac
+import itertools
+import os
+import random
+import struct
+from datetime import date, timedelta
+
+import name_grammar
+
+
+PERMALINK_VERSION = 4  # Bump whenever the same seed would generate a different name
+PERMALINK_HEADER = struct.Struct('>BQH2s')  # version, seed, issue date as days since the epoch, locale
+PERMALINK_MAC_SIZE = 8  # Bytes of HMAC-SHA256 appended to every token
+EPOCH_DATE = date(1970, 1, 1)
+
+# Seeds hash the input with a per-process key and counter, so they never repeat
+_seed_key = os.urandom(16)
+_seed_counter = itertools.count()
+
+
+def new_seed(first_name='', last_name=''):
+    """Fresh 64-bit seed derived from the input and a counter"""
+    digest = hashlib.blake2b(
+        f"{first_name}\0{last_name}\0{next(_seed_counter)}".encode('utf-8'),
+        key=_seed_key, digest_size=8
+    ).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def generate_leprechaun_name(first_name, last_name, seed=None, locale=None):
+    """
+    Generate a leprechaun name with Irish flair
+
+    Args:
+        first_name: Input first name, or empty for a random name
+        last_name: Input last name, or empty for a random name
+        seed: Optional 64-bit seed; the same seed and input always give the same name
+        locale: Name locale, or None for the default
+
+    Returns:
+        The leprechaun name
+    """
+    rng = random.Random(seed) if seed is not None else random
+    engine = name_grammar.get_name_engine()
+
+    if not first_name or not last_name:
+        return engine.generate('random', locale=locale, rng=rng)
+    return engine.generate('irish', first_name, last_name, locale=locale, rng=rng)
+
+
+def _permalink_mac(payload, key):
+    """Truncated HMAC of a token payload, so tokens cannot be forged without the key"""
+    return hmac.new(key, b'permalink\0' + payload, hashlib.sha256).digest()[:PERMALINK_MAC_SIZE]
+
+
+def encode_permalink(seed, first_name, last_name, issued, locale, key):
+    """
+    Compact URL-safe signed token holding everything needed to regenerate a name
+
+    Args:
+        seed: Seed passed to generate_leprechaun_name
+        first_name: Input first name ('' for random names)
+        last_name: Input last name ('' for random names)
+        issued: Date printed on the certificate
+        locale: Two-letter name locale the name was generated in
+        key: Secret key (bytes) the token is signed with
+
+    Returns:
+        Token string (28 characters for random names)
+    """
+    if len(locale) != 2 or not locale.isascii():
+        raise ValueError(f"Permalinks need a two-letter locale code, got '{locale}'")
+    payload = PERMALINK_HEADER.pack(PERMALINK_VERSION, seed, (issued - EPOCH_DATE).days, locale.encode('ascii'))
+    if first_name or last_name:
+        payload += f"{first_name}\0{last_name}".encode('utf-8')
+    return base64.urlsafe_b64encode(payload + _permalink_mac(payload, key)).rstrip(b'=').decode('ascii')
+
+
+def decode_permalink(token, key):
+    """
+    Verify and parse a permalink token
+
+    Args:
+        token: Token produced by encode_permalink
+        key: Secret key (bytes) the token was signed with
+
+    Returns:
+        (seed, first name, last name, issue date, locale)
+
+    Raises:
+        ValueError: If the token is malformed or its signature does not match
+    """
+    try:
+        signed = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except ValueError as e:
+        raise ValueError(f"Malformed permalink: {e}")
+    payload, mac = signed[:-PERMALINK_MAC_SIZE], signed[-PERMALINK_MAC_SIZE:]
+    if len(signed) <= PERMALINK_MAC_SIZE or not hmac.compare_digest(mac, _permalink_mac(payload, key)):
+        raise ValueError("Invalid permalink signature")
+
+    try:
+        version, seed, days, locale = PERMALINK_HEADER.unpack_from(payload)
+        locale = locale.decode('ascii')
+        names = payload[PERMALINK_HEADER.size:].decode('utf-8')
+    except (ValueError, struct.error) as e:
+        raise ValueError(f"Malformed permalink: {e}")
+    if version != PERMALINK_VERSION:
+        raise ValueError(f"Unsupported permalink version {version}")
+
+    first_name, last_name = '', ''
+    if names:
+        if names.count('\0') != 1:
+            raise ValueError("Malformed permalink names")
+        first_name, last_name = names.split('\0')
+    return seed, first_name, last_name, EPOCH_DATE + timedelta(days=days), locale
+
+
+def generate_names(count=0, people=None, locale=None):
+    """
+    Generate names in bulk, drawing each table once for the whole batch
+
+    Args:
+        count: Number of random names to draw
+        people: Optional list of (first name, last name) pairs to personalise
+        locale: Name locale, or None for the default
+
+    Returns:
+        List of leprechaun names, personalised ones first
+    """
+    engine = name_grammar.get_name_engine()
+    people = people or []
+    complete = [{'first_name': first, 'last_name': last} for first, last in people if first and last]
+    personalised = iter(engine.generate_many('irish', complete, locale))
+    # Pairs with a missing part get a random name, as with generate_leprechaun_name
+    random_names = iter(engine.generate_many('random', [{}] * (count + len(people) - len(complete)), locale))
+    names = [next(personalised) if first and last else next(random_names) for first, last in people]
+    names.extend(random_names)
+    return names
@@ -0,0 +1,228 @@
+"""
+Name generation engine for Leprechaun Name Generator
+Compiles the weighted name tables in config into alias-method samplers at startup
+"""
+
+import random
+import string
+from itertools import accumulate
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional; batches fall back to random.choices
+    numpy = None
+
+# Pattern slots filled from the request rather than from a table
+INPUT_SLOTS = ('first_name', 'last_name')
+
+
+class AliasSampler:
+    """
+    Weighted choice in O(1) per draw (Vose's alias method)
+    """
+
+    def __init__(self, weighted):
+        """
+        Build the alias tables
+
+        Args:
+            weighted: List of values (equal weights) or dict of value -> weight
+
+        Raises:
+            ValueError: If there are no values or the weights are invalid
+        """
+        if isinstance(weighted, dict):
+            values, weights = list(weighted), list(weighted.values())
+        else:
+            values, weights = list(weighted), [1] * len(weighted)
+        if not values:
+            raise ValueError("A weighted table needs at least one value")
+        if any(weight < 0 for weight in weights) or sum(weights) <= 0:
+            raise ValueError("Weights must be non-negative with a positive total")
+
+        size = len(values)
+        total = sum(weights)
+        scaled = [weight * size / total for weight in weights]
+        probability = [1.0] * size
+        alias = list(range(size))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+
+        self.values = tuple(values)
+        self.size = size
+        self.probability = probability
+        self.alias = alias
+        self.cum_weights = list(accumulate(weights))
+        if numpy is not None:
+            self.np_probability = numpy.array(probability)
+            self.np_alias = numpy.array(alias)
+
+    def sample(self, rng=random):
+        """Draw one value using a single random number"""
+        u = rng.random() * self.size
+        i = int(u)
+        return self.values[i if u - i < self.probability[i] else self.alias[i]]
+
+    def sample_many(self, count):
+        """Draw count values in one vectorised step"""
+        if numpy is not None:
+            picks = numpy.random.randint(0, self.size, count)
+            coins = numpy.random.random_sample(count)
+            picks = numpy.where(coins < self.np_probability[picks], picks, self.np_alias[picks])
+            values = self.values
+            return [values[i] for i in picks.tolist()]
+        return random.choices(self.values, cum_weights=self.cum_weights, k=count)
+
+
+class NameStyle:
+    """
+    One compiled style: weighted patterns whose {slots} are filled from weighted tables
+    """
+
+    def __init__(self, name, spec):
+        """
+        Compile a style
+
+        Args:
+            name: Style name, used in error messages
+            spec: Dict with 'patterns' and optional 'tables', each a list or dict of weights
+
+        Raises:
+            ValueError: If a pattern refers to an unknown table
+        """
+        self.name = name
+        self.tables = {key: AliasSampler(values) for key, values in spec.get('tables', {}).items()}
+        patterns = spec['patterns']
+        # Each pattern compiles to a tuple of (literal text, slot name or None)
+        compiled = {}
+        for pattern, weight in (patterns.items() if isinstance(patterns, dict) else ((p, 1) for p in patterns)):
+            parts = tuple((literal, slot) for literal, slot, _, _ in string.Formatter().parse(pattern))
+            for _, slot in parts:
+                if slot is not None and slot not in self.tables and slot not in INPUT_SLOTS:
+                    raise ValueError(f"Style '{name}' pattern '{pattern}' uses unknown table '{slot}'")
+            compiled[parts] = weight
+        self.patterns = AliasSampler(compiled)
+        self.uses_input = any(slot in INPUT_SLOTS for parts in self.patterns.values for _, slot in parts)
+
+    def generate(self, inputs, rng=random):
+        """Expand one name, drawing each table at most once"""
+        drawn = {}
+        out = []
+        for literal, slot in self.patterns.sample(rng):
+            out.append(literal)
+            if slot is None:
+                continue
+            if slot in INPUT_SLOTS:
+                out.append(inputs.get(slot, ''))
+            else:
+                if slot not in drawn:
+                    drawn[slot] = self.tables[slot].sample(rng)
+                out.append(drawn[slot])
+        return ''.join(out)
+
+    def generate_many(self, inputs_list):
+        """Expand one name per inputs dict, with every table drawn for the whole batch at once"""
+        count = len(inputs_list)
+        patterns = self.patterns.sample_many(count)
+        draws = {slot: table.sample_many(count) for slot, table in self.tables.items()}
+        names = []
+        for row, (parts, inputs) in enumerate(zip(patterns, inputs_list)):
+            out = []
+            for literal, slot in parts:
+                out.append(literal)
+                if slot is None:
+                    continue
+                out.append(inputs.get(slot, '') if slot in INPUT_SLOTS else draws[slot][row])
+            names.append(''.join(out))
+        return names
+
+
+class NameEngine:
+    """
+    Compiled styles for every configured locale
+    """
+
+    def __init__(self, locales, default_locale):
+        """
+        Compile all styles
+
+        Args:
+            locales: Dict of locale -> {style name -> style spec}
+            default_locale: Locale used when none is requested; also the fallback
+                for styles a locale does not define
+        """
+        if default_locale not in locales:
+            raise ValueError(f"Default locale '{default_locale}' is not configured")
+        self.default_locale = default_locale
+        self.locales = {
+            locale: {style: NameStyle(f"{locale}/{style}", spec) for style, spec in styles.items()}
+            for locale, styles in locales.items()
+        }
+        print(f"Compiled {sum(len(styles) for styles in self.locales.values())} name styles "
+              f"for {len(self.locales)} locales")
+
+    def get_style(self, style, locale=None):
+        """
+        Look up a compiled style
+
+        Raises:
+            KeyError: If the style exists in neither the locale nor the default locale
+        """
+        styles = self.locales.get(locale or self.default_locale, {})
+        if style in styles:
+            return styles[style]
+        return self.locales[self.default_locale][style]
+
+    def styles(self, locale=None):
+        """Style names available in a locale"""
+        return sorted(set(self.locales[self.default_locale]) | set(self.locales.get(locale, {})))
+
+    def generate(self, style, first_name='', last_name='', locale=None, rng=random):
+        """
+        Generate one name
+
+        Args:
+            style: Style name
+            first_name: Input first name for styles that use it
+            last_name: Input last name for styles that use it
+            locale: Locale, or None for the default
+            rng: Random source; pass random.Random(seed) for reproducible names
+
+        Returns:
+            The generated string
+        """
+        inputs = {'first_name': first_name, 'last_name': last_name}
+        return self.get_style(style, locale).generate(inputs, rng)
+
+    def generate_many(self, style, inputs_list, locale=None):
+        """
+        Generate one name per inputs dict ({'first_name': ..., 'last_name': ...})
+
+        Returns:
+            List of generated strings
+        """
+        return self.get_style(style, locale).generate_many(inputs_list)
+
+
+# Global engine instance
+_name_engine = None
+
+def init_name_engine(locales, default_locale):
+    """Initialize the global name engine"""
+    global _name_engine
+    if _name_engine is None:
+        _name_engine = NameEngine(locales, default_locale)
+    return _name_engine
+
+def get_name_engine():
+    """Get the global name engine instance"""
+    global _name_engine
+    if _name_engine is None:
+        raise RuntimeError("Name engine not initialized. Call init_name_engine() first.")
+    return _name_engine
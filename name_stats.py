@@ -0,0 +1,97 @@
+"""
+Incremental name statistics for Leprechaun Name Generator
+Aggregates are updated on every saved name so /stats never scans the history
+"""
+
+import threading
+from collections import Counter
+
+from records import leprechaun_name_of, method_of
+
+
+class HeavyHitters:
+    """
+    Space-Saving sketch of the most frequent values in a stream
+
+    Tracks at most `capacity` values; any value occurring more than n / capacity
+    times is guaranteed to be tracked, with its count overestimated by at most `error`.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}  # value -> [count, error]
+
+    def add(self, value):
+        entry = self.counts.get(value)
+        if entry is not None:
+            entry[0] += 1
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[value] = [1, 0]
+            return
+        # Replace the least frequent value; its count becomes the newcomer's error bound
+        victim = min(self.counts, key=lambda key: self.counts[key][0])
+        floor = self.counts.pop(victim)[0]
+        self.counts[value] = [floor + 1, floor]
+
+    def top(self, n):
+        """The n most frequent values as (value, count, error)"""
+        ranked = sorted(self.counts.items(), key=lambda item: item[1][0], reverse=True)
+        return [(value, count, error) for value, (count, error) in ranked[:n]]
+
+
+class NameStatistics:
+    """
+    Counters, hourly histogram and popular names maintained as names are saved
+    """
+
+    def __init__(self, hourly_buckets=48, heavy_hitter_capacity=100):
+        """
+        Initialize empty statistics
+
+        Args:
+            hourly_buckets: Most recent hours kept in the histogram
+            heavy_hitter_capacity: Names tracked by the popular-names sketch
+        """
+        self.hourly_buckets = hourly_buckets
+        self.heavy_hitter_capacity = heavy_hitter_capacity
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything"""
+        with self.lock:
+            self.total = 0
+            self.by_method = Counter()
+            self.per_hour = {}  # 'YYYY-MM-DDTHH' -> count
+            self.top_names = HeavyHitters(self.heavy_hitter_capacity)
+
+    def observe(self, record):
+        """Fold one saved name into the aggregates"""
+        hour = (record.get('timestamp') or '')[:13]
+        name = leprechaun_name_of(record)
+        method = method_of(record)
+        with self.lock:
+            self.total += 1
+            self.by_method[method] += 1
+            if hour:
+                self.per_hour[hour] = self.per_hour.get(hour, 0) + 1
+                if len(self.per_hour) > self.hourly_buckets:
+                    del self.per_hour[min(self.per_hour)]
+            if name:
+                self.top_names.add(name)
+
+    def summary(self, top=10):
+        """Aggregates for /stats; cost depends only on the configured bounds"""
+        with self.lock:
+            random_count = self.by_method.get('random', 0)
+            return {
+                'total': self.total,
+                'byMethod': dict(self.by_method),
+                'randomShare': round(random_count / self.total, 4) if self.total else 0.0,
+                'perHour': [{'hour': hour, 'count': count} for hour, count in sorted(self.per_hour.items())],
+                'topNames': [
+                    {'name': name, 'count': count, 'maxOvercount': error}
+                    for name, count, error in self.top_names.top(top)
+                ]
+            }
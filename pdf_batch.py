@@ -0,0 +1,109 @@
+"""
+Batch certificate helpers for Leprechaun Name Generator
+Renders name lists in parallel and streams the results as a ZIP archive
+"""
+
+import io
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Write-only buffer that hands out what has been written so far
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def drain(self):
+        """Return and forget everything written since the last drain"""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def certificate_filename(index, name):
+    """Build a unique archive member name for a certificate"""
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', name).strip('-').lower() or 'leprechaun'
+    return f"{index + 1:03d}-{slug}.pdf"
+
+
+def iter_rendered(names, render, concurrency=2):
+    """
+    Render names in parallel, yielding results in input order as they complete
+
+    At most concurrency * 2 renders are in flight, so finished PDFs never pile up in memory.
+
+    Args:
+        names: List of names to render
+        render: Callable taking a name and returning (pdf bytes, error)
+        concurrency: Number of renders run at once
+
+    Yields:
+        (index, name, pdf bytes or None, error or None)
+    """
+    window = max(concurrency * 2, 1)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        names_iter = iter(enumerate(names))
+        for index, name in names_iter:
+            pending.append((index, name, executor.submit(render, name)))
+            if len(pending) >= window:
+                break
+
+        while pending:
+            index, name, future = pending.popleft()
+            try:
+                pdf, error = future.result()
+            except Exception as e:
+                pdf, error = None, str(e)
+            yield index, name, pdf, error
+
+            next_item = next(names_iter, None)
+            if next_item is not None:
+                pending.append((next_item[0], next_item[1], executor.submit(render, next_item[1])))
+
+
+def stream_zip(names, render, concurrency=2):
+    """
+    Stream a ZIP archive of certificates, one member per name
+
+    Each member is emitted as soon as its PDF is ready; failed names are listed in errors.txt.
+
+    Args:
+        names: List of names to render
+        render: Callable taking a name and returning (pdf bytes, error)
+        concurrency: Number of renders run at once
+
+    Yields:
+        Chunks of the ZIP archive
+    """
+    buffer = _StreamBuffer()
+    errors = []
+    # PDFs are already compressed, so store members as-is
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for index, name, pdf, error in iter_rendered(names, render, concurrency):
+            if error or pdf is None:
+                errors.append(f"{name}: {error or 'render failed'}")
+                continue
+            archive.writestr(certificate_filename(index, name), pdf)
+            yield buffer.drain()
+
+        if errors:
+            archive.writestr('errors.txt', '\n'.join(errors) + '\n')
+    yield buffer.drain()
@@ -0,0 +1,196 @@
+"""
+PDF output cache for Leprechaun Name Generator
+Caches rendered certificates by (template, name, date) in memory with an optional disk tier
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class PDFCache:
+    """
+    Bounded LRU cache of rendered PDF bytes with TTL expiry
+    """
+
+    def __init__(self, max_size=1000, ttl=300, cache_dir=None, disk_max_files=10000, disk_ttl=86400):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum PDFs held in memory
+            ttl: Seconds a PDF stays valid in memory
+            cache_dir: Directory for the disk tier (None disables it)
+            disk_max_files: Maximum PDFs kept on disk
+            disk_ttl: Seconds a PDF stays valid on disk
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.disk_max_files = disk_max_files
+        self.disk_ttl = disk_ttl
+        self.entries = OrderedDict()  # key -> (expires_at, pdf bytes)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.disk_files = 0
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                if not os.access(self.cache_dir, os.W_OK):
+                    raise PermissionError(f"{self.cache_dir} is not writable")
+                self.disk_files = len([f for f in os.listdir(self.cache_dir) if f.endswith('.pdf')])
+            except OSError as e:
+                # Read-only filesystems (e.g. Vercel) still get the memory tier
+                print(f"Warning: PDF cache directory unusable ({e}); caching PDFs in memory only")
+                self.cache_dir = None
+
+    @staticmethod
+    def make_key(template_name, name, date_str):
+        """Build the content address for a certificate"""
+        raw = '\0'.join((template_name, name, date_str)).encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _remember(self, key, pdf):
+        """Store PDF bytes in the memory tier, evicting the least recently used"""
+        self.entries[key] = (time.monotonic() + self.ttl, pdf)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key):
+        """Read a PDF from the disk tier, or None if missing or expired"""
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.disk_ttl:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, pdf):
+        """Write a PDF to the disk tier atomically"""
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(pdf)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing PDF cache file: {e}")
+            return
+        with self.lock:
+            self.disk_files += 1
+            prune = self.disk_files > self.disk_max_files
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Drop the oldest tenth of the disk tier once it exceeds its bound"""
+        try:
+            paths = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if f.endswith('.pdf')]
+            paths.sort(key=os.path.getmtime)
+            keep = int(self.disk_max_files * 0.9)
+            for path in paths[:max(len(paths) - keep, 0)]:
+                os.remove(path)
+            with self.lock:
+                self.disk_files = min(len(paths), keep)
+        except OSError as e:
+            print(f"Error pruning PDF cache: {e}")
+
+    def get(self, template_name, name, date_str):
+        """
+        Look up a rendered certificate
+
+        Returns:
+            PDF bytes, or None on a miss
+        """
+        key = self.make_key(template_name, name, date_str)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self.entries[key]
+
+        pdf = self._read_disk(key) if self.cache_dir else None
+        with self.lock:
+            if pdf is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, pdf)
+            return pdf
+
+    def contains(self, template_name, name, date_str):
+        """Whether a certificate is cached in either tier, without counting a lookup"""
+        key = self.make_key(template_name, name, date_str)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return True
+        if not self.cache_dir:
+            return False
+        try:
+            return time.time() - os.path.getmtime(self._disk_path(key)) <= self.disk_ttl
+        except OSError:
+            return False
+
+    def put(self, template_name, name, date_str, pdf):
+        """Store a rendered certificate"""
+        key = self.make_key(template_name, name, date_str)
+        with self.lock:
+            self._remember(key, pdf)
+        if self.cache_dir:
+            self._write_disk(key, pdf)
+
+    def clear(self):
+        """Empty the memory tier"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Get cache counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'diskHits': self.disk_hits,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self.entries),
+                'maxSize': self.max_size,
+                'diskEnabled': bool(self.cache_dir)
+            }
+
+# Global PDF cache instance
+_pdf_cache = None
+
+def init_pdf_cache(max_size=1000, ttl=300, cache_dir=None, disk_max_files=10000, disk_ttl=86400):
+    """Initialize the global PDF cache"""
+    global _pdf_cache
+    if _pdf_cache is None:
+        _pdf_cache = PDFCache(max_size, ttl, cache_dir, disk_max_files, disk_ttl)
+    return _pdf_cache
+
+def get_pdf_cache():
+    """Get the global PDF cache instance"""
+    global _pdf_cache
+    if _pdf_cache is None:
+        raise RuntimeError("PDF cache not initialized. Call init_pdf_cache() first.")
+    return _pdf_cache
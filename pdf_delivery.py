@@ -0,0 +1,33 @@
+"""
+PDF delivery for Leprechaun Name Generator
+Hands rendered certificates to the WSGI server straight from memory, with no temp files
+"""
+
+from flask import Response
+
+
+def certificate_filename(day):
+    """Download file name for a certificate dated day"""
+    return f"leprechaun-certificate-{day.strftime('%Y%m%d')}.pdf"
+
+
+def pdf_response(pdf, filename, inline=False):
+    """
+    Build the response for a rendered PDF
+
+    The bytes from the renderer or the PDF cache become the response body as they
+    are: nothing is copied, nothing is written to disk, and Content-Length is set
+    from their size, so the server sends them in one pass without chunked encoding.
+
+    Args:
+        pdf: PDF bytes
+        filename: File name offered to the client
+        inline: Display in the browser instead of downloading
+
+    Returns:
+        Flask Response
+    """
+    response = Response(pdf, mimetype='application/pdf')
+    disposition = 'inline' if inline else 'attachment'
+    response.headers['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+    return response
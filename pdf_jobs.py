@@ -0,0 +1,371 @@
+"""
+Asynchronous PDF job queue for Leprechaun Name Generator
+Decouples certificate rendering from request latency with polling and result retrieval
+"""
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are waiting to run"""
+
+
+class PDFJob:
+    """
+    A single certificate render job
+    """
+
+    def __init__(self, name, template_name, watermarked=False, job_id=None):
+        self.id = job_id or secrets.token_urlsafe(16)
+        self.name = name
+        self.template_name = template_name
+        self.watermarked = watermarked
+        self.status = 'queued'  # queued -> running -> done | failed
+        self.created = time.time()
+        self.finished = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        """Public view of the job"""
+        return {
+            'jobId': self.id,
+            'status': self.status,
+            'template': self.template_name,
+            'created': self.created,
+            'finished': self.finished,
+            'error': self.error
+        }
+
+
+class MemoryJobStore:
+    """
+    Job status and results held in this process only
+    """
+
+    def __init__(self):
+        self.jobs = {}  # job id -> PDFJob
+        self.lock = threading.Lock()
+
+    def save(self, job):
+        with self.lock:
+            self.jobs[job.id] = job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def claim(self):
+        """Mark the oldest queued job running and return it, or None if nothing is queued"""
+        with self.lock:
+            queued = [job for job in self.jobs.values() if job.status == 'queued']
+            if not queued:
+                return None
+            job = min(queued, key=lambda job: job.created)
+            job.status = 'running'
+            return job
+
+    def expire(self, cutoff):
+        """Drop finished jobs older than cutoff"""
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items() if job.finished and job.finished < cutoff]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+    def status_counts(self):
+        with self.lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {status: statuses.count(status) for status in set(statuses)}
+
+
+class SQLiteJobStore:
+    """
+    Job status and results in a SQLite file shared by every worker process
+
+    Any worker can claim a queued job, answer the client's polls and hand out
+    the PDF, so a job outlives the worker that accepted it.
+    """
+
+    def __init__(self, db_file='pdf-jobs.db'):
+        """
+        Open the database, creating the schema if needed
+
+        Args:
+            db_file: Path to SQLite database file
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened for writing
+        """
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        self.conn = None
+        self.pid = None
+        with self.lock:
+            self._connect()
+
+    def _connect(self):
+        """Open a connection for the current process (call with lock held)"""
+        # Connections must not be shared with forked children
+        if self.pid == os.getpid():
+            return self.conn
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                template TEXT NOT NULL,
+                watermarked INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                created REAL NOT NULL,
+                updated REAL NOT NULL,
+                finished REAL,
+                error TEXT,
+                result BLOB
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs (updated);
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created);
+        ''')
+        self.conn.commit()
+        self.pid = os.getpid()
+        return self.conn
+
+    def save(self, job):
+        with self.lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO jobs (id, name, template, watermarked, status, created, updated, finished, error, result) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (job.id, job.name, job.template_name, int(job.watermarked), job.status, job.created,
+                     time.time(), job.finished, job.error, job.result)
+                )
+
+    def get(self, job_id):
+        with self.lock:
+            row = self._connect().execute(
+                'SELECT name, template, watermarked, status, created, finished, error, result FROM jobs WHERE id = ?',
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        name, template_name, watermarked, status, created, finished, error, result = row
+        job = PDFJob(name, template_name, bool(watermarked), job_id)
+        job.status, job.created, job.finished, job.error, job.result = status, created, finished, error, result
+        return job
+
+    def claim(self):
+        """Mark the oldest queued job running and return it, or None if nothing is queued"""
+        with self.lock:
+            conn = self._connect()
+            while True:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                # Another worker may claim the same row first; only one UPDATE matches
+                with conn:
+                    claimed = conn.execute(
+                        "UPDATE jobs SET status = 'running', updated = ? WHERE id = ? AND status = 'queued'",
+                        (time.time(), row[0])
+                    ).rowcount
+                if claimed:
+                    break
+        return self.get(row[0])
+
+    def expire(self, cutoff):
+        """Drop jobs last updated before cutoff, including ones left unfinished by a worker that exited"""
+        with self.lock:
+            conn = self._connect()
+            with conn:
+                conn.execute('DELETE FROM jobs WHERE updated < ?', (cutoff,))
+
+    def status_counts(self):
+        with self.lock:
+            rows = self._connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return dict(rows)
+
+
+def create_job_store(db_file=None):
+    """
+    Shared job store in db_file, or a process-local one if db_file is None or cannot be written
+    """
+    if db_file:
+        try:
+            return SQLiteJobStore(db_file)
+        except sqlite3.Error as e:
+            print(f"Warning: cannot open PDF job database {db_file} ({e}), jobs are only visible to the worker that accepted them")
+    return MemoryJobStore()
+
+
+class PDFJobQueue:
+    """
+    Job queue whose worker threads claim jobs from the store, with expiring results
+    """
+
+    def __init__(self, render, workers=2, max_pending=100, result_ttl=600, store=None,
+                 poll_interval=0.5, sweep_interval=60):
+        """
+        Initialize the queue (workers are started on first use)
+
+        Args:
+            render: Callable taking (name, template_name, watermarked) and returning (pdf bytes, error)
+            workers: Number of worker threads
+            max_pending: Jobs allowed to wait before new submissions are rejected
+            result_ttl: Seconds a finished job and its PDF are kept
+            store: Where jobs wait and their status and results are kept (default: MemoryJobStore)
+            poll_interval: Seconds an idle worker waits before checking the store for jobs queued elsewhere
+            sweep_interval: Seconds between sweeps that drop expired jobs
+        """
+        self.render = render
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.store = store or MemoryJobStore()
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = {}  # job id -> PDFJob rendering in this process
+        self.threads = []
+        self.pid = None
+        self.stopping = False
+        self.last_sweep = 0
+
+    def _start(self):
+        """Start worker threads for the current process"""
+        with self.lock:
+            # Threads do not survive a fork, so start them in each process
+            if self.pid == os.getpid():
+                return
+            self.threads = []
+            self.running = {}
+            self.stopping = False
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self._worker, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+            self.pid = os.getpid()
+
+    def _worker(self):
+        """Worker thread: render jobs claimed from the store, whichever worker queued them"""
+        while not self.stopping:
+            self._sweep()
+            try:
+                job = self.store.claim()
+            except Exception as e:
+                print(f"Error claiming PDF job: {e}")
+                job = None
+            if job is None:
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+                continue
+
+            with self.lock:
+                self.running[job.id] = job
+            try:
+                try:
+                    pdf, error = self.render(job.name, job.template_name, job.watermarked)
+                except Exception as e:
+                    pdf, error = None, str(e)
+                job.result = pdf
+                job.error = error
+                job.status = 'failed' if error or pdf is None else 'done'
+                job.finished = time.time()
+                self.store.save(job)
+            except Exception as e:
+                print(f"Error recording PDF job {job.id}: {e}")
+            finally:
+                with self.lock:
+                    self.running.pop(job.id, None)
+
+    def _sweep(self):
+        """Drop jobs older than the result TTL, at most once per sweep interval"""
+        with self.lock:
+            now = time.time()
+            if now - self.last_sweep < self.sweep_interval:
+                return
+            self.last_sweep = now
+        try:
+            self.store.expire(now - self.result_ttl)
+        except Exception as e:
+            print(f"Error expiring PDF jobs: {e}")
+
+    def submit(self, name, template_name, watermarked=False):
+        """
+        Queue a certificate render
+
+        Returns:
+            The queued PDFJob
+        """
+        if self.pid != os.getpid():
+            self._start()
+
+        if self.store.status_counts().get('queued', 0) >= self.max_pending:
+            raise JobQueueFull("Too many PDF jobs are waiting")
+        job = PDFJob(name, template_name, watermarked)
+        self.store.save(job)
+        self.wakeup.set()
+        return job
+
+    def get(self, job_id):
+        """Get a job by id, or None if unknown or expired"""
+        # A poll can land on a worker that never accepted a job; start it so it claims orphaned ones
+        if self.pid != os.getpid():
+            self._start()
+        return self.store.get(job_id)
+
+    def stop(self):
+        """Stop claiming jobs and hand the ones rendering here back to the queue for another worker"""
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+            self.stopping = True
+            interrupted = list(self.running.values())
+            self.pid = None
+        self.wakeup.set()
+        for job in interrupted:
+            job.status = 'queued'
+            try:
+                self.store.save(job)
+            except Exception as e:
+                print(f"Error requeueing PDF job {job.id}: {e}")
+        if interrupted:
+            print(f"Requeued {len(interrupted)} interrupted PDF jobs")
+
+    def stats(self):
+        """Get job counters across every worker sharing the store"""
+        counts = self.store.status_counts()
+        return {
+            'pending': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0)
+        }
+
+# Global job queue instance
+_job_queue = None
+
+def init_job_queue(render, workers=2, max_pending=100, result_ttl=600, store=None, sweep_interval=60):
+    """Initialize the global job queue"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = PDFJobQueue(render, workers, max_pending, result_ttl, store, sweep_interval=sweep_interval)
+    return _job_queue
+
+def get_job_queue():
+    """Get the global job queue instance"""
+    global _job_queue
+    if _job_queue is None:
+        raise RuntimeError("Job queue not initialized. Call init_job_queue() first.")
+    return _job_queue
+
+def stop_job_queue():
+    """Stop the global job queue's workers in this process"""
+    if _job_queue:
+        _job_queue.stop()
@@ -0,0 +1,154 @@
+"""
+Certificate preview thumbnails for Leprechaun Name Generator
+Rasterizes the first page of rendered PDFs to PNG/WebP and keeps the images in a size-bounded cache
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+try:
+    import pypdfium2 as pdfium
+    PREVIEW_AVAILABLE = True
+except ImportError:
+    # Optional: WeasyPrint cannot rasterize, so previews are disabled without pypdfium2
+    PREVIEW_AVAILABLE = False
+
+# Format name -> (Pillow format, MIME type, Pillow save options)
+IMAGE_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'png': ('PNG', 'image/png', {'optimize': True}),
+}
+
+_pdfium_lock = threading.Lock()  # PDFium is not thread-safe
+
+
+def rasterize(pdf_data, width, image_format='png'):
+    """
+    Render the first page of a PDF as an image
+
+    Args:
+        pdf_data: PDF bytes
+        width: Image width in pixels (height follows the page's aspect ratio)
+        image_format: Key of IMAGE_FORMATS
+
+    Returns:
+        Encoded image bytes
+    """
+    if not PREVIEW_AVAILABLE:
+        raise RuntimeError("pypdfium2 is required for certificate previews")
+    pil_format, _, options = IMAGE_FORMATS[image_format]
+    with _pdfium_lock:
+        document = pdfium.PdfDocument(pdf_data)
+        try:
+            page = document[0]
+            bitmap = page.render(scale=width / page.get_width())
+            image = bitmap.to_pil()
+            page.close()
+        finally:
+            document.close()
+    # Encoding runs outside the lock; Pillow releases the GIL while compressing
+    output = BytesIO()
+    image.save(output, pil_format, **options)
+    return output.getvalue()
+
+
+class PreviewCache:
+    """
+    LRU cache of encoded preview images bounded by their total size
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Total image bytes kept before the least recently used are evicted
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> image bytes
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(*parts):
+        """
+        Content address of a preview, also used as its ETag
+
+        Args:
+            parts: Everything that determines the image (template, name, date, size, format, ...)
+        """
+        raw = '\0'.join(str(part) for part in parts).encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()[:32]
+
+    def get(self, key):
+        """Look up an image, returning None on a miss"""
+        with self.lock:
+            image = self.entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def __contains__(self, key):
+        """Whether an image is cached, without counting a lookup"""
+        with self.lock:
+            return key in self.entries
+
+    def put(self, key, image):
+        """Store an image, evicting the least recently used to stay within max_bytes"""
+        if len(image) > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.entries[key] = image
+            self.size += len(image)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Empty the cache"""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Get cache counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'maxBytes': self.max_bytes
+            }
+
+# Global preview cache instance
+_preview_cache = None
+
+def init_preview_cache(max_bytes=32 * 1024 * 1024):
+    """Initialize the global preview cache"""
+    global _preview_cache
+    if _preview_cache is None:
+        _preview_cache = PreviewCache(max_bytes)
+    return _preview_cache
+
+def get_preview_cache():
+    """Get the global preview cache instance"""
+    global _preview_cache
+    if _preview_cache is None:
+        raise RuntimeError("Preview cache not initialized. Call init_preview_cache() first.")
+    return _preview_cache
@@ -0,0 +1,213 @@
+"""
+Shared rate-limit storage for Leprechaun Name Generator
+A SQLite backend for the limits library so every worker process enforces the same limits
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from math import floor
+
+from limits.storage import MovingWindowSupport, SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+
+class SQLiteRateLimitStorage(Storage, MovingWindowSupport, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Rate-limit counters in a local SQLite file shared by all processes on the host
+
+    Registered for sqlite:// URIs: sqlite:///ratelimits.db is relative to the working
+    directory, sqlite:////var/lib/app/ratelimits.db is absolute. Every check runs in an
+    IMMEDIATE transaction, so concurrent workers cannot both take the last slot.
+    Supports the fixed-window, moving-window and sliding-window-counter strategies.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    # Operations between sweeps of expired rows
+    CLEANUP_INTERVAL = 1000
+
+    def __init__(self, uri='sqlite:///ratelimits.db', wrap_exceptions=False, **options):
+        path = uri.split('://', 1)[1]
+        self.db_file = path[1:] if path.startswith('/') else path
+        self.timeout = float(options.get('timeout', 5))
+        self.lock = threading.Lock()
+        self.conn = None
+        self.pid = None
+        self.operations = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        """Open a connection for the current process (call with lock held)"""
+        # Connections must not be shared with forked children
+        if self.pid == os.getpid():
+            return self.conn
+        self.conn = sqlite3.connect(self.db_file, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')  # Limits are not worth an fsync per request
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS counters (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL,
+                expires REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                key TEXT NOT NULL,
+                at REAL NOT NULL,
+                expires REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_key_at ON events (key, at);
+            CREATE INDEX IF NOT EXISTS idx_events_expires ON events (expires);
+        ''')
+        self.pid = os.getpid()
+        return self.conn
+
+    @contextmanager
+    def _transaction(self):
+        """Serialized read-modify-write across threads and processes"""
+        with self.lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                self.operations += 1
+                if self.operations % self.CLEANUP_INTERVAL == 0:
+                    now = time.time()
+                    conn.execute('DELETE FROM counters WHERE expires <= ?', (now,))
+                    conn.execute('DELETE FROM events WHERE expires <= ?', (now,))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+    def _get(self, conn, key, now):
+        row = conn.execute('SELECT value FROM counters WHERE key = ? AND expires > ?', (key, now)).fetchone()
+        return row[0] if row else 0
+
+    def _incr(self, conn, key, expiry, amount, now):
+        # An expired counter restarts with a fresh expiry, like MemoryStorage
+        conn.execute('DELETE FROM counters WHERE key = ? AND expires <= ?', (key, now))
+        conn.execute(
+            'INSERT INTO counters (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = value + excluded.value',
+            (key, amount, now + expiry)
+        )
+        return self._get(conn, key, now)
+
+    def incr(self, key, expiry, amount=1):
+        with self._transaction() as conn:
+            return self._incr(conn, key, expiry, amount, time.time())
+
+    def get(self, key):
+        with self._transaction() as conn:
+            return self._get(conn, key, time.time())
+
+    def get_expiry(self, key):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT expires FROM counters WHERE key = ? AND expires > ?', (key, now)).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            with self._transaction() as conn:
+                conn.execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self._transaction() as conn:
+            count = conn.execute('SELECT (SELECT COUNT(*) FROM counters) + (SELECT COUNT(*) FROM events)').fetchone()[0]
+            conn.execute('DELETE FROM counters')
+            conn.execute('DELETE FROM events')
+        return count
+
+    def clear(self, key):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM counters WHERE key = ?', (key,))
+            conn.execute('DELETE FROM events WHERE key = ?', (key,))
+
+    # Moving window: one row per hit
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            used = conn.execute('SELECT COUNT(*) FROM events WHERE key = ? AND at >= ?', (key, now - expiry)).fetchone()[0]
+            if used + amount > limit:
+                return False
+            conn.executemany('INSERT INTO events (key, at, expires) VALUES (?, ?, ?)', [(key, now, now + expiry)] * amount)
+            return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        with self._transaction() as conn:
+            oldest, count = conn.execute(
+                'SELECT MIN(at), COUNT(*) FROM events WHERE key = ? AND at >= ?', (key, now - expiry)
+            ).fetchone()
+        return (oldest, count) if count else (now, 0)
+
+    # Sliding window counter: weighted previous window plus current window
+
+    def _sliding_window(self, conn, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            # The current window's counter must outlive the next window, which weighs it
+            self._incr(conn, self.sliding_window_keys(key, expiry, now)[1], 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        with self._transaction() as conn:
+            return self._sliding_window(conn, key, expiry, now)
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+
+def usable_storage_uri(uri):
+    """
+    Check that a sqlite:// rate-limit database can be written, falling back to memory://
+
+    Flask-Limiter re-raises storage errors, so an unwritable database (e.g. on a
+    read-only serverless filesystem) would otherwise fail every request.
+
+    Args:
+        uri: Configured storage URI
+
+    Returns:
+        uri, or "memory://" if it is a sqlite:// URI whose database cannot be opened
+    """
+    if not uri.startswith('sqlite://'):
+        return uri
+    storage = SQLiteRateLimitStorage(uri)
+    usable = storage.check()
+    if storage.conn is not None:
+        storage.conn.close()
+    if usable:
+        return uri
+    print(f"Warning: cannot open rate-limit database {storage.db_file}, limiting each process separately in memory")
+    return 'memory://'
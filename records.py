@@ -0,0 +1,223 @@
+"""
+Columnar record store for Leprechaun Name Generator
+Holds name records column by column instead of as one dict per record
+"""
+
+import ipaddress
+from abc import ABC, abstractmethod
+from array import array
+from datetime import datetime, timedelta
+
+INT64_MIN = -2 ** 63
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+class Column(ABC):
+    """
+    One field of every record, encoded as integers in a typed array
+
+    Values the encoding cannot represent exactly are kept as-is in an overflow dict.
+    """
+
+    typecode = 'q'
+    missing = INT64_MIN
+
+    def __init__(self, length=0):
+        self.codes = array(self.typecode, [self.missing]) * length
+        self.overflow = {}  # row -> raw value
+
+    @abstractmethod
+    def encode(self, value):
+        """Integer code for value, or None if it must go to overflow"""
+
+    @abstractmethod
+    def decode(self, code):
+        """Value for an integer code"""
+
+    def append(self, value, present=True):
+        if not present:
+            self.codes.append(self.missing)
+            return
+        code = self.encode(value)
+        if code is None:
+            self.overflow[len(self.codes)] = value
+            code = self.missing
+        self.codes.append(code)
+
+    def get(self, row):
+        """(present, value) for a row"""
+        code = self.codes[row]
+        if code != self.missing:
+            return True, self.decode(code)
+        if row in self.overflow:
+            return True, self.overflow[row]
+        return False, None
+
+    def nbytes(self):
+        return self.codes.itemsize * len(self.codes)
+
+
+class StringColumn(Column):
+    """Interned strings: each distinct value is stored once"""
+
+    typecode = 'I'
+    missing = 0
+
+    def __init__(self, length=0):
+        super().__init__(length)
+        self.values = [None]  # code -> string, code 0 means missing
+        self.index = {}  # string -> code
+
+    def encode(self, value):
+        if type(value) is not str:
+            return None
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.index[value] = code
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+    def nbytes(self):
+        return super().nbytes() + sum(len(value) for value in self.values[1:])
+
+
+class IntColumn(Column):
+    """64-bit integers"""
+
+    def encode(self, value):
+        if type(value) is not int or not INT64_MIN < value < 2 ** 63:
+            return None
+        return value
+
+    def decode(self, code):
+        return code
+
+
+class TimestampColumn(Column):
+    """Naive ISO-8601 timestamps as microseconds since the epoch"""
+
+    def encode(self, value):
+        if type(value) is not str:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if parsed.tzinfo is not None:
+            return None
+        code = (parsed - EPOCH) // ONE_MICROSECOND
+        # Only keep encodings that reproduce the original text exactly
+        if self.decode(code) != value:
+            return None
+        return code
+
+    def decode(self, code):
+        return (EPOCH + timedelta(microseconds=code)).isoformat()
+
+
+class IPv4Column(Column):
+    """IPv4 addresses packed into integers; other addresses overflow"""
+
+    def encode(self, value):
+        if type(value) is not str:
+            return None
+        try:
+            address = ipaddress.IPv4Address(value)
+        except ValueError:
+            return None
+        if str(address) != value:
+            return None
+        return int(address)
+
+    def decode(self, code):
+        return str(ipaddress.IPv4Address(code))
+
+
+def leprechaun_name_of(record):
+    """Generated name of a record from either app's schema"""
+    # Legacy app.py records use leprechaun_name, app_secure records use leprechaunName
+    return record.get('leprechaunName', record.get('leprechaun_name'))
+
+
+def method_of(record):
+    """Generation method of a record: app.py's method, or random/personalised for app_secure"""
+    if 'method' in record:
+        return record['method']
+    return 'random' if record.get('firstName') == 'Random' else 'personalised'
+
+
+# Column type per record key; other keys are stored as strings
+COLUMN_TYPES = {
+    'timestamp': TimestampColumn,
+    'ip': IPv4Column,
+    'id': IntColumn,
+}
+
+
+class ColumnarRecordStore:
+    """
+    Append-only table of dict records stored column by column
+
+    Rows below len() never change, so a reader holding a length can read them
+    while another thread appends.
+    """
+
+    def __init__(self, records=()):
+        self.length = 0
+        self.columns = {}  # key -> Column, in first-seen key order
+        self.extend(records)
+
+    def __len__(self):
+        return self.length
+
+    def _column(self, key):
+        column = self.columns.get(key)
+        if column is None:
+            column = COLUMN_TYPES.get(key, StringColumn)(self.length)
+            # Replace rather than mutate so concurrent readers keep a stable dict
+            self.columns = {**self.columns, key: column}
+        return column
+
+    def append(self, record):
+        """Append a record dict"""
+        for key in record:
+            self._column(key)
+        for key, column in self.columns.items():
+            column.append(record.get(key), key in record)
+        self.length += 1
+
+    def extend(self, records):
+        """Append several record dicts"""
+        for record in records:
+            self.append(record)
+
+    def row(self, index):
+        """Rebuild the record at index as a dict"""
+        record = {}
+        for key, column in self.columns.items():
+            present, value = column.get(index)
+            if present:
+                record[key] = value
+        return record
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("record index out of range")
+        return self.row(index)
+
+    def __iter__(self):
+        for index in range(self.length):
+            yield self.row(index)
+
+    def nbytes(self):
+        """Approximate payload bytes held by the columns"""
+        return sum(column.nbytes() for column in self.columns.values())
@@ -0,0 +1,274 @@
+"""
+PDF render worker pool for Leprechaun Name Generator
+Keeps warm WeasyPrint worker processes so certificate renders run off the request thread
+"""
+
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+from multiprocessing.connection import Connection
+
+import metrics
+
+
+class RenderPoolBusy(Exception):
+    """Raised when the render queue is full"""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render job does not finish in time"""
+
+
+class RenderError(Exception):
+    """Raised when a worker fails to render a job"""
+
+
+class RenderWorker:
+    """
+    A single render worker process connected over a socket pair
+    """
+
+    def __init__(self, template_dir):
+        """
+        Start a worker process
+
+        Args:
+            template_dir: Directory containing PDF templates
+        """
+        parent_sock, child_sock = socket.socketpair()
+        # Run this file as a script so the worker never re-imports the web application
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), str(child_sock.fileno()), template_dir],
+            pass_fds=(child_sock.fileno(),)
+        )
+        child_sock.close()
+        self.conn = Connection(parent_sock.detach())
+        self.renders = 0
+
+    def send(self, job):
+        """Send a job to the worker"""
+        self.conn.send(job)
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds for a result, returning None on timeout"""
+        if not self.conn.poll(timeout):
+            return None
+        return self.conn.recv()
+
+    def stop(self, timeout=5):
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        """Kill the worker immediately"""
+        self.process.kill()
+        self.process.wait()
+        self.conn.close()
+
+
+class RenderPool:
+    """
+    Pool of warm render workers with bounded queueing, job timeouts and worker recycling
+    """
+
+    def __init__(self, template_dir='pdf-templates', workers=2, max_queue=8,
+                 timeout=30, max_renders_per_worker=200):
+        """
+        Initialize the pool (workers are started on first use)
+
+        Args:
+            template_dir: Directory containing PDF templates
+            workers: Number of worker processes
+            max_queue: Jobs allowed to wait for a free worker before rejecting
+            timeout: Seconds a job may wait for a worker and then render
+            max_renders_per_worker: Renders before a worker is replaced
+        """
+        self.template_dir = template_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.max_renders_per_worker = max_renders_per_worker
+        self.slots = threading.BoundedSemaphore(workers + max_queue)
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.pid = None
+        self.running = False
+
+    def start(self):
+        """Start worker processes for the current process"""
+        with self.lock:
+            # Workers belong to the process that started them, so restart after a fork
+            if self.running and self.pid == os.getpid():
+                return
+            self.idle = queue.Queue()
+            for _ in range(self.workers):
+                self.idle.put(RenderWorker(self.template_dir))
+            self.pid = os.getpid()
+            self.running = True
+        print(f"Render pool started ({self.workers} workers)")
+
+    def stop(self):
+        """Stop all idle workers"""
+        with self.lock:
+            self.running = False
+            while True:
+                try:
+                    worker = self.idle.get_nowait()
+                except queue.Empty:
+                    break
+                worker.stop()
+        print("Render pool stopped")
+
+    def _replace(self, worker, kill=False):
+        """Retire a worker and put a fresh one in the idle queue"""
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        if self.running:
+            self.idle.put(RenderWorker(self.template_dir))
+
+    def _replace_in_background(self, worker, kill=False):
+        """Replace a worker without holding up the caller"""
+        threading.Thread(target=self._replace, args=(worker, kill), daemon=True).start()
+
+    def _run(self, method, args, timeout, timer=None):
+        """Run a job on an idle worker and return its result"""
+        if not self.running or self.pid != os.getpid():
+            self.start()
+
+        if not self.slots.acquire(blocking=False):
+            raise RenderPoolBusy("Render queue is full")
+        try:
+            try:
+                with (timer or metrics.null_timer)('pool_wait'):
+                    worker = self.idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise RenderTimeout("Timed out waiting for a render worker")
+
+            try:
+                # The worker times its stages only when asked, and sends them back with the result
+                worker.send((method, args, timer is not None))
+                result = worker.wait(timeout)
+            except (EOFError, OSError) as e:
+                self._replace_in_background(worker, kill=True)
+                raise RenderError(f"Render worker failed: {e}")
+
+            if result is None:
+                # A stuck render can only be stopped by killing its process
+                self._replace_in_background(worker, kill=True)
+                raise RenderTimeout(f"Render exceeded {timeout}s")
+
+            worker.renders += 1
+            if worker.renders >= self.max_renders_per_worker:
+                self._replace_in_background(worker)
+            else:
+                self.idle.put(worker)
+
+            ok, payload, durations = result
+            if timer is not None and durations:
+                timer.durations.extend(durations)
+            if not ok:
+                raise RenderError(payload)
+            return payload
+        finally:
+            self.slots.release()
+
+    def render(self, template_name, name, date_str, watermark_text=None, timer=None):
+        """
+        Render a certificate on a pool worker
+
+        Args:
+            template_name: Name of the template
+            name: Name to place on the certificate
+            date_str: Date string to place on the certificate
+            watermark_text: Watermark rendered into the page, or None
+            timer: metrics.StageTimer receiving the queue wait and the worker's render stages, or None
+
+        Returns:
+            PDF bytes
+        """
+        return self._run('render', (template_name, name, date_str, watermark_text), self.timeout, timer)
+
+    def render_many(self, template_name, names, date_str, watermark_text=None, timer=None):
+        """
+        Render a multi-page certificate PDF on a pool worker
+
+        Args:
+            template_name: Name of the template
+            names: Names to place on the certificates, one page each
+            date_str: Date string to place on the certificates
+            watermark_text: Watermark rendered into each page, or None
+            timer: metrics.StageTimer, as for render()
+
+        Returns:
+            PDF bytes
+        """
+        # The time limit applies per page
+        args = (template_name, names, date_str, watermark_text)
+        return self._run('render_many', args, self.timeout * max(len(names), 1), timer)
+
+
+WORKER_METHODS = ('render', 'render_many')
+
+def _worker_main(fd, template_dir):
+    """Worker process loop: load WeasyPrint and templates once, then serve jobs"""
+    import template_loader
+
+    conn = Connection(fd)
+    loader = template_loader.TemplateLoader(template_dir)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        method, args, timed = job
+        timer = metrics.StageTimer() if timed else metrics.null_timer
+        try:
+            if method not in WORKER_METHODS:
+                raise ValueError(f"Unknown render method: {method}")
+            result = getattr(loader, method)(*args, timer=timer)
+            conn.send((True, result, timer.durations if timed else None))
+        except Exception as e:
+            conn.send((False, str(e), timer.durations if timed else None))
+    conn.close()
+
+# Global render pool instance
+_render_pool = None
+
+def init_render_pool(template_dir='pdf-templates', workers=2, max_queue=8,
+                     timeout=30, max_renders_per_worker=200):
+    """Initialize the global render pool"""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = RenderPool(template_dir, workers, max_queue, timeout, max_renders_per_worker)
+    return _render_pool
+
+def get_render_pool():
+    """Get the global render pool instance"""
+    global _render_pool
+    if _render_pool is None:
+        raise RuntimeError("Render pool not initialized. Call init_render_pool() first.")
+    return _render_pool
+
+def stop_render_pool():
+    """Stop the global render pool"""
+    global _render_pool
+    if _render_pool:
+        _render_pool.stop()
+        _render_pool = None
+
+if __name__ == '__main__':
+    _worker_main(int(sys.argv[1]), sys.argv[2])
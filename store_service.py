@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Single-writer name store service for Leprechaun Name Generator
+One process owns the names database; web workers send it batched appends over a Unix socket
+Usage: python store_service.py [--socket names-store.sock] [--db-file names.json] [--backend json]
+"""
+
+import argparse
+import fcntl
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+from multiprocessing.connection import Client, Listener
+
+import cache
+import config
+
+# Records returned per read request
+READ_BATCH_SIZE = 1000
+
+
+class StoreUnavailable(Exception):
+    """Raised when the store service cannot be reached"""
+
+
+def _serve_connection(conn, name_cache):
+    """Answer one client's requests until it disconnects"""
+    try:
+        while True:
+            try:
+                op, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            if op == 'append':
+                result = name_cache.add_many(args[0]) if args[0] else name_cache.get_count()
+                result = (result, name_cache.get_count())
+            elif op == 'count':
+                result = name_cache.get_count()
+            elif op == 'read':
+                start, limit = args
+                result = list(islice(name_cache.iter_names(start), limit))
+            elif op == 'save':
+                result = name_cache.save_now()
+            elif op == 'clear':
+                result = name_cache.clear()
+            elif op == 'shutdown':
+                conn.send(True)
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+            else:
+                result = None
+            conn.send(result)
+    finally:
+        conn.close()
+
+
+def serve(socket_path, db_file, backend, auto_save_interval, log_flush_interval):
+    """Run the store service until SIGTERM or a shutdown request"""
+    if os.path.exists(socket_path):
+        try:
+            Client(socket_path, family='AF_UNIX').close()
+            print(f"Store service already running on {socket_path}")
+            return 1
+        except OSError:
+            os.unlink(socket_path)  # Left behind by a service that died
+
+    def handle_sigterm(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    name_cache = cache.NameDatabaseCache(db_file, auto_save_interval, log_flush_interval, backend)
+    old_umask = os.umask(0o177)  # Socket is only reachable by this user
+    try:
+        listener = Listener(socket_path, family='AF_UNIX')
+    finally:
+        os.umask(old_umask)
+    print(f"Store service listening on {socket_path} ({name_cache.get_count()} names)")
+
+    try:
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_serve_connection, args=(conn, name_cache), daemon=True).start()
+    finally:
+        listener.close()
+        name_cache.stop()
+        print("Store service stopped")
+
+
+class StoreClient:
+    """
+    NameDatabaseCache stand-in that forwards names to the store service (same interface,
+    including the wait_for_id=False default of add())
+
+    add() only appends to a local buffer; a background thread sends the buffer
+    as one batch per flush interval, so requests never wait on the service or disk.
+    The same thread follows the service's log, feeds observers every name
+    added by any worker, and periodically lets them checkpoint their state.
+    """
+
+    def __init__(self, socket_path, flush_interval=0.05, max_buffer=10000, spawn_args=None, checkpoint_interval=300):
+        """
+        Connect to (and if needed start) the store service
+
+        Args:
+            socket_path: Unix socket of the store service
+            flush_interval: Seconds between batched sends
+            max_buffer: Names held locally while the service is unreachable before add() fails
+            spawn_args: Arguments for starting the service if it is not running, or None
+                if it is managed elsewhere
+            checkpoint_interval: Seconds between observer checkpoints (see NameDatabaseCache)
+        """
+        self.socket_path = socket_path
+        self.flush_interval = flush_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.max_buffer = max_buffer
+        self.spawn_args = spawn_args
+        self.spawned = None  # Service process started by this client
+        self.observers = []
+        self._reset_process_state()
+        self.cursor = self._call('count')  # Next seq observers have not yet seen
+        self.known_count = self.cursor
+        self._start_flusher()
+
+    def _reset_process_state(self):
+        """Locks, buffer and connection belonging to the current process"""
+        self.lock = threading.Lock()  # Guards buffer
+        self.conn_lock = threading.Lock()  # Serializes requests on the connection
+        self.observer_lock = threading.Lock()  # Serializes feeding observers
+        self.buffer = []
+        self.conn = None
+        self.running = False
+        self.stop_event = threading.Event()
+        self.flush_thread = None
+
+    def _connect(self):
+        """Open the connection, starting the service first if allowed (call with conn_lock held)"""
+        try:
+            return Client(self.socket_path, family='AF_UNIX')
+        except OSError:
+            if self.spawn_args is None:
+                raise StoreUnavailable(f"Store service is not running on {self.socket_path}")
+
+        # One process starts the service; the others wait for its socket
+        with open(f"{self.socket_path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                return Client(self.socket_path, family='AF_UNIX')
+            except OSError:
+                pass
+            self.spawned = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--socket', self.socket_path] + self.spawn_args,
+                start_new_session=True  # Not killed with the worker that started it
+            )
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                try:
+                    return Client(self.socket_path, family='AF_UNIX')
+                except OSError:
+                    if self.spawned.poll() is not None:
+                        break
+                    time.sleep(0.05)
+        raise StoreUnavailable(f"Store service did not start on {self.socket_path}")
+
+    def _call(self, op, *args):
+        """Send one request and wait for its reply"""
+        with self.conn_lock:
+            for attempt in range(2):
+                try:
+                    if self.conn is None:
+                        self.conn = self._connect()
+                    self.conn.send((op, args))
+                    return self.conn.recv()
+                except (OSError, EOFError) as e:
+                    # The service restarted: reconnect once
+                    self.conn = None
+                    if attempt:
+                        raise StoreUnavailable(f"Store service request failed: {e}")
+
+    def _flush(self):
+        """Send buffered names as one batch, then catch observers up"""
+        with self.lock:
+            batch, self.buffer = self.buffer, []
+        try:
+            _, self.known_count = self._call('append', batch)
+        except StoreUnavailable as e:
+            print(f"Error sending names to store service: {e}")
+            with self.lock:
+                self.buffer = batch + self.buffer
+            return False
+        if self.observers:
+            self._follow()
+        return True
+
+    def _follow(self):
+        """Feed observers every name the service has that they have not seen"""
+        with self.observer_lock:
+            while self.cursor < self.known_count:
+                records = self._call('read', self.cursor, READ_BATCH_SIZE)
+                if not records:
+                    break
+                for seq, record in records:
+                    for observer in self.observers:
+                        try:
+                            observer.observe(record)
+                        except Exception as e:
+                            print(f"Error in cache observer: {e}")
+                self.cursor = records[-1][0] + 1
+
+    def _checkpoint(self):
+        """Let observers that persist their own state save it, as NameDatabaseCache does after compacting"""
+        with self.observer_lock:
+            for observer in self.observers:
+                checkpoint = getattr(observer, 'checkpoint', None)
+                if checkpoint:
+                    checkpoint()
+
+    def _flush_worker(self):
+        """Background thread: send batches, follow the log and checkpoint observers"""
+        next_checkpoint = time.monotonic() + self.checkpoint_interval
+        while self.running:
+            self.stop_event.wait(self.flush_interval)
+            if self.running:
+                self._flush()
+                if time.monotonic() >= next_checkpoint:
+                    self._checkpoint()
+                    next_checkpoint = time.monotonic() + self.checkpoint_interval
+
+    def _start_flusher(self):
+        self.running = True
+        self.flush_thread = threading.Thread(target=self._flush_worker, daemon=True)
+        self.flush_thread.start()
+
+    def reopen_after_fork(self):
+        """Reconnect and restart the flush thread in a forked worker"""
+        # Observers keep the parent's state, which is a prefix of the log; following resumes from the cursor
+        self._reset_process_state()
+        self.spawned = None
+        self._start_flusher()
+
+    def stop(self):
+        """Send any buffered names and disconnect (the service keeps running)"""
+        self.running = False
+        self.stop_event.set()
+        if self.flush_thread:
+            self.flush_thread.join(timeout=5)
+        if self.buffer and not self._flush():
+            print(f"Store service unreachable, {len(self.buffer)} names not saved")
+        self._checkpoint()
+        with self.conn_lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+        print("Store client stopped")
+
+    def stop_service(self):
+        """Ask the service to save and exit, if this client started it"""
+        if self.spawned is None:
+            return
+        self.spawn_args = None  # Never restart it from here
+        try:
+            self._call('shutdown')
+        except StoreUnavailable:
+            pass
+        self.spawned.wait(timeout=30)
+        self.spawned = None
+
+    # NameDatabaseCache interface
+
+    def add(self, name_data, wait_for_id=False):
+        """
+        Buffer a name; its seq and 'id' are assigned by the service
+
+        Args:
+            name_data: Record to store
+            wait_for_id: Send the name to the service now instead of buffering it,
+                so its seq is known and its 'id' set
+
+        Returns:
+            Index (seq) of the added item, or None if it was buffered
+        """
+        if not wait_for_id:
+            self.add_many([name_data])
+            return None
+        if 'timestamp' not in name_data:
+            name_data['timestamp'] = datetime.now().isoformat()
+        index, _ = self._call('append', [name_data])
+        name_data['id'] = index + 1  # As stamped by the service
+        return index
+
+    def add_many(self, names):
+        """Buffer several names (returns None, see add)"""
+        timestamp = datetime.now().isoformat()
+        for name_data in names:
+            if 'timestamp' not in name_data:
+                name_data['timestamp'] = timestamp
+        with self.lock:
+            if len(self.buffer) + len(names) > self.max_buffer:
+                raise StoreUnavailable("Store service unreachable and the local buffer is full")
+            self.buffer.extend(names)
+        return None
+
+    def add_observer(self, observer, replay=False):
+        """
+        Register an aggregate fed every name added by any worker
+
+        Args:
+            observer: Object with observe(record) and reset() methods, and optionally
+                checkpoint(), called periodically and on stop
+            replay: Feed the observer every existing name first
+        """
+        with self.observer_lock:
+            if replay:
+                for _, record in self.iter_names(0, self.cursor):
+                    observer.observe(record)
+            self.observers.append(observer)
+
+    def iter_names(self, start=0, stop=None):
+        """Iterate (seq, record) pairs held by the service, fetched in batches"""
+        while stop is None or start < stop:
+            limit = READ_BATCH_SIZE if stop is None else min(READ_BATCH_SIZE, stop - start)
+            records = self._call('read', start, limit)
+            if not records:
+                return
+            yield from records
+            start = records[-1][0] + 1
+
+    def get_all(self):
+        """Get all names held by the service"""
+        return [record for _, record in self.iter_names()]
+
+    def get_count(self):
+        """Names in the service plus names still buffered here"""
+        with self.lock:
+            buffered = len(self.buffer)
+        return self._call('count') + buffered
+
+    def save_now(self):
+        """Send buffered names, have the service compact its storage and checkpoint observers"""
+        if not (self._flush() and self._call('save')):
+            return False
+        self._checkpoint()
+        return True
+
+    def clear(self):
+        """Clear the database (use with caution)"""
+        with self.lock:
+            self.buffer = []
+        with self.observer_lock:
+            result = self._call('clear')
+            self.cursor = self.known_count = 0
+            for observer in self.observers:
+                observer.reset()
+        return result
+
+# Global client instance
+_store_client = None
+
+def init_store_client(socket_path, flush_interval=0.05, max_buffer=10000, spawn_args=None, checkpoint_interval=300):
+    """Initialize the global store client"""
+    global _store_client
+    if _store_client is None:
+        _store_client = StoreClient(socket_path, flush_interval, max_buffer, spawn_args, checkpoint_interval)
+    return _store_client
+
+def get_store_client():
+    """Get the global store client instance"""
+    global _store_client
+    if _store_client is None:
+        raise RuntimeError("Store client not initialized. Call init_store_client() first.")
+    return _store_client
+
+def stop_store_client(stop_service=False):
+    """Stop the global store client, and the service too if it started it and stop_service is set"""
+    global _store_client
+    if _store_client:
+        _store_client.stop()
+        if stop_service:
+            _store_client.stop_service()
+        _store_client = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the single-writer name store service")
+    parser.add_argument('--socket', default=config.DB_STORE_SOCKET, help="Unix socket path")
+    parser.add_argument('--db-file', default=None, help="Database file (default depends on --backend)")
+    parser.add_argument('--backend', default=config.DB_BACKEND, choices=sorted(cache.STORAGE_BACKENDS))
+    args = parser.parse_args()
+
+    db_file = args.db_file or (config.DB_SQLITE_FILE if args.backend == 'sqlite' else config.DB_FILE)
+    return serve(args.socket, db_file, args.backend, config.DB_AUTO_SAVE_INTERVAL, config.DB_LOG_FLUSH_INTERVAL)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,21 +4,92 @@ Pre-loads PDF templates at startup for improved performance
 """
 
 import os
+import re
+import threading
+from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
+
+import asset_bundle
+import metrics
+import watermark
+
+STYLE_BLOCK_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL)
+STYLESHEET_LINK_RE = re.compile(r'<link\b[^>]*rel=["\']stylesheet["\'][^>]*>', re.IGNORECASE)
+HREF_RE = re.compile(r'href=["\']([^"\']+)["\']', re.IGNORECASE)
+
+class PreparedTemplate:
+    """
+    Template split into a pre-parsed stylesheet and a slim HTML skeleton
+    """
+
+    def __init__(self, template_content, font_config, url_fetcher):
+        """
+        Parse the template's linked and inline CSS once
+
+        Args:
+            template_content: Raw template HTML
+            font_config: Shared font configuration so @font-face rules resolve once
+            url_fetcher: WeasyPrint url_fetcher used for linked stylesheets and fonts
+        """
+        self.font_config = font_config
+        self.url_fetcher = url_fetcher
+        self.stylesheets = []
+        for link in STYLESHEET_LINK_RE.findall(template_content):
+            href = HREF_RE.search(link)
+            if href:
+                self.stylesheets.append(CSS(url=href.group(1), font_config=font_config, url_fetcher=url_fetcher))
+        css_text = '\n'.join(STYLE_BLOCK_RE.findall(template_content))
+        self.stylesheets.append(CSS(string=css_text, font_config=font_config, url_fetcher=url_fetcher))
+        # Only the markup without stylesheets is parsed per certificate
+        self.html = STYLESHEET_LINK_RE.sub('', STYLE_BLOCK_RE.sub('', template_content))
+
+    def document(self, name, date_str, watermark_text=None, timer=metrics.null_timer):
+        """Fill in the name and date (and watermark, if given) and lay out the certificate"""
+        with timer('substitute'):
+            html_content = self.html.replace('{{name}}', name)
+            html_content = html_content.replace('{{date}}', date_str)
+            if watermark_text:
+                html_content = watermark.create_watermarked_html(html_content, watermark_text)
+        with timer('parse_html'):
+            html = HTML(string=html_content, url_fetcher=self.url_fetcher)
+        # Layout includes matching text to the fonts loaded with the stylesheets
+        with timer('layout'):
+            return html.render(stylesheets=self.stylesheets, font_config=self.font_config)
+
+    def render(self, name, date_str, watermark_text=None, timer=metrics.null_timer):
+        """Fill in the name and date and render to PDF bytes"""
+        document = self.document(name, date_str, watermark_text, timer)
+        with timer('write_pdf'):
+            return document.write_pdf()
+
+    def render_many(self, names, date_str, watermark_text=None, timer=metrics.null_timer):
+        """Render one certificate page per name into a single PDF"""
+        documents = [self.document(name, date_str, watermark_text, timer) for name in names]
+        pages = [page for document in documents for page in document.pages]
+        with timer('write_pdf'):
+            return documents[0].copy(pages).write_pdf()
 
 class TemplateLoader:
     """
     Pre-loads and caches PDF templates
     """
 
-    def __init__(self, template_dir='pdf-templates'):
+    def __init__(self, template_dir='pdf-templates', url_fetcher=None, timer=metrics.null_timer):
         """
         Initialize template loader
 
         Args:
             template_dir: Directory containing PDF templates
+            url_fetcher: WeasyPrint url_fetcher (defaults to the offline asset bundle)
+            timer: Stage timer for template preparation (stylesheet parsing and font loading)
         """
         self.template_dir = template_dir
+        self.url_fetcher = url_fetcher or asset_bundle.get_url_fetcher()
+        self.timer = timer
         self.templates = {}
+        self.prepared = {}
+        self.font_config = FontConfiguration()
+        self.render_lock = threading.Lock()  # Shared font configuration is not thread-safe
         self._load_all_templates()
 
     def _load_all_templates(self):
@@ -33,11 +104,22 @@ class TemplateLoader:
             filepath = os.path.join(self.template_dir, filename)
             try:
                 with open(filepath, 'r') as f:
-                    self.templates[template_name] = f.read()
+                    # Serve fonts from the local bundle instead of fonts.googleapis.com
+                    self.templates[template_name] = asset_bundle.rewrite_asset_urls(f.read())
                 print(f"Loaded template: {template_name} from {filename}")
             except Exception as e:
                 print(f"Error loading template {template_name} from {filepath}: {e}")
                 self.templates[template_name] = ''
+                continue
+
+            try:
+                # @font-face fonts are fetched and loaded here, once per template
+                with self.timer('prepare_template'):
+                    self.prepared[template_name] = PreparedTemplate(
+                        self.templates[template_name], self.font_config, self.url_fetcher)
+            except Exception as e:
+                # Fall back to rendering the raw template
+                print(f"Error preparing template {template_name}: {e}")
 
         print(f"Loaded {len(self.templates)} templates")
 
@@ -53,6 +135,55 @@ class TemplateLoader:
         """
         return self.templates.get(template_name, '')
 
+    def render(self, template_name, name, date_str, watermark_text=None, timer=metrics.null_timer):
+        """
+        Render a certificate from a pre-loaded template
+
+        Args:
+            template_name: Name of the template
+            name: Name to place on the certificate
+            date_str: Date string to place on the certificate
+            watermark_text: Watermark rendered into the page, or None (see watermark.WatermarkStamper
+                for stamping already-rendered PDFs instead)
+            timer: Stage timer for the substitution, parsing, layout and PDF writing stages
+
+        Returns:
+            PDF bytes
+        """
+        prepared = self.prepared.get(template_name)
+        if prepared:
+            with self.render_lock:
+                return prepared.render(name, date_str, watermark_text, timer)
+
+        template_content = self.get_template(template_name)
+        if not template_content:
+            raise ValueError(f"Template '{template_name}' not found")
+        if watermark_text:
+            template_content = watermark.create_watermarked_html(template_content, watermark_text)
+        return render_certificate(template_content, name, date_str, self.url_fetcher, timer)
+
+    def render_many(self, template_name, names, date_str, watermark_text=None, timer=metrics.null_timer):
+        """
+        Render certificates for several names into one multi-page PDF
+
+        Args:
+            template_name: Name of the template
+            names: Names to place on the certificates, one page each
+            date_str: Date string to place on the certificates
+            watermark_text: Watermark rendered into each page, or None
+            timer: Stage timer, as for render()
+
+        Returns:
+            PDF bytes
+        """
+        if not names:
+            raise ValueError("No names to render")
+        prepared = self.prepared.get(template_name)
+        if not prepared:
+            raise ValueError(f"Template '{template_name}' not prepared")
+        with self.render_lock:
+            return prepared.render_many(names, date_str, watermark_text, timer)
+
     def get_all_templates(self):
         """Get all loaded templates"""
         return self.templates.copy()
@@ -60,17 +191,31 @@ class TemplateLoader:
     def reload(self):
         """Reload all templates from disk"""
         self.templates.clear()
+        self.prepared.clear()
         self._load_all_templates()
         return len(self.templates)
 
+def render_certificate(template_content, name, date_str, url_fetcher=None, timer=metrics.null_timer):
+    """Replace certificate placeholders and render the HTML to PDF bytes"""
+    with timer('substitute'):
+        html_content = template_content.replace('{{name}}', name)
+        html_content = html_content.replace('{{date}}', date_str)
+    with timer('parse_html'):
+        html = HTML(string=html_content, url_fetcher=url_fetcher or asset_bundle.get_url_fetcher())
+    # Stylesheets and fonts are loaded during layout for unprepared templates
+    with timer('layout'):
+        document = html.render()
+    with timer('write_pdf'):
+        return document.write_pdf()
+
 # Global template loader instance
 _template_loader = None
 
-def init_template_loader(template_dir='pdf-templates'):
+def init_template_loader(template_dir='pdf-templates', timer=metrics.null_timer):
     """Initialize the global template loader"""
     global _template_loader
     if _template_loader is None:
-        _template_loader = TemplateLoader(template_dir)
+        _template_loader = TemplateLoader(template_dir, timer=timer)
     return _template_loader
 
 def get_template_loader():
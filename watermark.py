@@ -1,21 +1,22 @@
+"""
+PDF watermarking for Leprechaun Name Generator
+Stamps a cached watermark overlay onto rendered certificates, so free and paid PDFs share one render
+"""
+
+import threading
+from io import BytesIO
 
-# watermark.py - Simple PDF watermarking
 from weasyprint import HTML
-from weasyprint.text.fonts import FontConfiguration
-import base64
 
-def add_watermark_to_pdf(pdf_data, watermark_text="FREE VERSION"):
-    """Add a simple watermark to PDF data"""
-    # For now, we'll just add a watermark text to the HTML
-    # In production, use proper PDF watermarking library
-    return pdf_data
+try:
+    from pypdf import PdfReader, PdfWriter
+    PDF_STAMPING_AVAILABLE = True
+except ImportError:
+    # Optional: without pypdf the watermark has to be rendered into the HTML (create_watermarked_html)
+    PDF_STAMPING_AVAILABLE = False
 
-# Alternative: Create watermarked HTML
-def create_watermarked_html(html_content, watermark_text="FREE VERSION"):
-    """Add watermark CSS to HTML"""
-    watermark_css = f"""
-    <style>
-    .watermark {{
+WATERMARK_CSS = """
+    .watermark {
         position: fixed;
         top: 50%;
         left: 50%;
@@ -26,13 +27,113 @@ def create_watermarked_html(html_content, watermark_text="FREE VERSION"):
         pointer-events: none;
         white-space: nowrap;
         font-weight: bold;
-    }}
-    </style>
-    <div class="watermark">{watermark_text}</div>
-    """
+    }
+"""
+
+def watermark_markup(watermark_text):
+    """Style block and element drawing the watermark"""
+    return f'<style>{WATERMARK_CSS}</style>\n<div class="watermark">{watermark_text}</div>\n'
+
+def create_watermarked_html(html_content, watermark_text="FREE VERSION"):
+    """Add watermark CSS to HTML"""
     # Insert watermark before closing body tag
     if '</body>' in html_content:
-        return html_content.replace('</body>', watermark_css + '
-</body>')
+        return html_content.replace('</body>', watermark_markup(watermark_text) + '</body>')
     else:
-        return html_content + watermark_css
+        return html_content + watermark_markup(watermark_text)
+
+def render_overlay(width, height, watermark_text):
+    """
+    Render a transparent page holding only the watermark
+
+    Args:
+        width: Page width in points
+        height: Page height in points
+        watermark_text: Text to draw
+
+    Returns:
+        PDF bytes of a single page
+    """
+    html_content = (
+        f'<html><head><style>@page {{ size: {width}pt {height}pt; margin: 0 }}'
+        f' html, body {{ margin: 0; background: transparent }}</style></head>'
+        f'<body>{watermark_markup(watermark_text)}</body></html>'
+    )
+    return HTML(string=html_content).write_pdf()
+
+class WatermarkStamper:
+    """
+    Merges a watermark overlay onto every page of rendered PDFs
+
+    The overlay is rendered once per page size and kept, so stamping a certificate
+    costs a PDF parse and merge rather than another HTML render.
+    """
+
+    def __init__(self, watermark_text="FREE VERSION"):
+        """
+        Initialize the stamper (overlays are rendered on first use)
+
+        Args:
+            watermark_text: Text drawn diagonally across each page
+        """
+        if not PDF_STAMPING_AVAILABLE:
+            raise RuntimeError("pypdf is required for PDF watermark stamping")
+        self.watermark_text = watermark_text
+        self.overlays = {}  # (width, height) in points -> overlay PDF bytes
+        self.lock = threading.Lock()
+
+    def _overlay(self, width, height):
+        """Overlay page for a page size, rendered on first request"""
+        key = (round(width, 1), round(height, 1))
+        with self.lock:
+            overlay = self.overlays.get(key)
+        if overlay is None:
+            # Rendered outside the lock; a concurrent first render of the same size is harmless
+            overlay = render_overlay(key[0], key[1], self.watermark_text)
+            with self.lock:
+                overlay = self.overlays.setdefault(key, overlay)
+        # Parsed per call: pypdf objects read their source lazily and are not thread-safe
+        return PdfReader(BytesIO(overlay)).pages[0]
+
+    def stamp(self, pdf_data):
+        """
+        Watermark every page of a PDF
+
+        Args:
+            pdf_data: PDF bytes
+
+        Returns:
+            Watermarked PDF bytes
+        """
+        reader = PdfReader(BytesIO(pdf_data))
+        writer = PdfWriter()
+        for page in reader.pages:
+            page.merge_page(self._overlay(float(page.mediabox.width), float(page.mediabox.height)))
+            writer.add_page(page)
+        output = BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+def add_watermark_to_pdf(pdf_data, watermark_text="FREE VERSION"):
+    """Add a watermark to PDF data (requires pypdf)"""
+    stamper = _watermark_stamper
+    if stamper is None or stamper.watermark_text != watermark_text:
+        stamper = WatermarkStamper(watermark_text)
+    return stamper.stamp(pdf_data)
+
+# Global watermark stamper instance
+_watermark_stamper = None
+
+def init_watermark_stamper(watermark_text="FREE VERSION"):
+    """Initialize the global watermark stamper"""
+    global _watermark_stamper
+    if _watermark_stamper is None:
+        _watermark_stamper = WatermarkStamper(watermark_text)
+    return _watermark_stamper
+
+def get_watermark_stamper():
+    """Get the global watermark stamper instance"""
+    global _watermark_stamper
+    if _watermark_stamper is None:
+        raise RuntimeError("Watermark stamper not initialized. Call init_watermark_stamper() first.")
+    return _watermark_stamper